@@ -4,6 +4,7 @@ from typing import Optional, Tuple, TYPE_CHECKING
 import color
 from entity import Actor
 import exceptions
+from map import NOISE_MELEE
 
 if TYPE_CHECKING:
     from engine import Engine
@@ -136,12 +137,14 @@ class MeleeAction(ActionWithDirection):
         else:
             attack_color = color.enemy_atk
 
+        self.engine.map.make_noise(target.x, target.y, NOISE_MELEE)
+
         attack_desc = f"{self.entity.name.capitalize()} attacks {target.name}"
         if damage > 0:
             self.engine.message_log.add_message(
                 f"{attack_desc} for {damage} damage", attack_color
             )
-            target.fighter.hp -= damage
+            target.fighter.take_damage(damage, source=self.entity.name)
         else:
             self.engine.message_log.add_message(
                 f"{attack_desc} but does no damage.", attack_color
@@ -0,0 +1,78 @@
+"""Run many headless games in parallel and stream a CSV row per game.
+
+Each game plays the greedy policy from its own seed:
+
+    python batch.py --games 1000 --output results.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import multiprocessing
+import os
+import sys
+import time
+from typing import Dict, Tuple, Union
+
+from actions import WaitAction
+from headless import HeadlessEngine
+import policies
+
+FIELDS = ["seed", "floors", "kills", "turns", "death_cause", "wall_time"]
+
+
+def run_game(args: Tuple[int, int]) -> Dict[str, Union[int, float, str]]:
+    seed, max_turns = args
+    start = time.perf_counter()
+
+    game = HeadlessEngine.new_game(seed=seed)
+    engine = game.engine
+    kills = 0
+
+    while not game.is_over and game.turns < max_turns:
+        actors = [actor for actor in engine.map.actors if actor is not engine.player]
+        if not game.step(policies.greedy_policy(engine)):
+            # nothing scripted can be done, so let the turn pass
+            game.step(WaitAction(engine.player))
+        kills += sum(1 for actor in actors if not actor.is_alive)
+
+    return {
+        "seed": seed,
+        "floors": engine.world.current_floor,
+        "kills": kills,
+        "turns": game.turns,
+        "death_cause": engine.player.fighter.last_damaged_by if game.is_over else "",
+        "wall_time": round(time.perf_counter() - start, 4),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game")
+    parser.add_argument("--max-turns", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--output", default="-", help="CSV file, or - for stdout")
+    args = parser.parse_args()
+
+    jobs = [(args.seed + i, args.max_turns) for i in range(args.games)]
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", newline="")
+    try:
+        writer = csv.DictWriter(out, fieldnames=FIELDS)
+        writer.writeheader()
+
+        # one game per task: games vary a lot in length, so small chunks
+        # keep every worker busy until the end
+        with multiprocessing.Pool(args.workers) as pool:
+            for result in pool.imap_unordered(run_game, jobs, chunksize=1):
+                writer.writerow(result)
+                out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
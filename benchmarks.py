@@ -0,0 +1,286 @@
+"""Micro-benchmarks for the engine's hot paths.
+
+    python benchmarks.py --output results.json
+    python benchmarks.py --save-baseline benchmarks_baseline.json
+    python benchmarks.py --compare benchmarks_baseline.json
+
+Every case is seeded, so the same maps and entity layouts are timed on
+each run. With --compare the exit status is 1 when any case got slower
+than the baseline by more than --threshold.
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from tcod.console import Console
+
+import color
+from engine import Engine
+import entity_factory
+from map import GameWorld
+from message_log import MessageLog
+from procgen import generate_dungeon
+import setup_game
+
+SIZES = [(40, 22), (80, 43), (160, 86)]
+ENTITY_COUNTS = [10, 100, 500]
+
+# (name, setup) where setup builds fresh state and returns the timed call
+Case = Tuple[str, Callable[[], Callable[[], object]]]
+
+
+def make_engine(width: int, height: int, mobs: int, seed: int = 0) -> Engine:
+    random.seed(seed)
+
+    player = copy.deepcopy(entity_factory.player)
+    # keep the player alive however long a case runs
+    player.fighter.max_hp = player.fighter.hp = 10**9
+
+    engine = Engine(player=player)
+    engine.world = GameWorld(
+        engine=engine,
+        max_rooms=max(30, width * height // 120),
+        room_min_size=6,
+        room_max_size=10,
+        map_width=width,
+        map_height=height,
+    )
+    engine.world.generate_floor()
+
+    # top up with rats on free floor tiles until there are `mobs` of them
+    floor = [
+        (x, y)
+        for x in range(width)
+        for y in range(height)
+        if engine.map.tiles["walkable"][x, y]
+    ]
+    random.shuffle(floor)
+    taken = {(entity.x, entity.y) for entity in engine.map.entities}
+    actors = sum(1 for actor in engine.map.actors) - 1
+    for x, y in floor:
+        if actors >= mobs:
+            break
+        if (x, y) not in taken:
+            entity_factory.rat.spawn(engine.map, x, y)
+            actors += 1
+
+    engine.update_fov()
+    return engine
+
+
+def farthest_mob(engine: Engine):
+    player = engine.player
+    return max(
+        (actor for actor in engine.map.actors if actor is not player),
+        key=lambda actor: actor.distance(player.x, player.y),
+    )
+
+
+def cases(
+    sizes: List[Tuple[int, int]], entity_counts: List[int], scratch: str
+) -> Iterator[Case]:
+    # save files go in scratch, a directory the caller cleans up
+    for width, height in sizes:
+        size = f"{width}x{height}"
+
+        def bench_generate(width: int = width, height: int = height):
+            engine = make_engine(width, height, 0)
+            return lambda: generate_dungeon(
+                max_rooms=engine.world.max_rooms,
+                room_min_size=6,
+                room_max_size=10,
+                engine=engine,
+                map_width=width,
+                map_height=height,
+            )
+
+        yield f"generate_dungeon[{size}]", bench_generate
+
+        def bench_fov(width: int = width, height: int = height):
+            return make_engine(width, height, 10).update_fov
+
+        yield f"update_fov[{size}]", bench_fov
+
+        for mobs in entity_counts:
+            params = f"{size},mobs={mobs}"
+
+            def bench_path(width: int = width, height: int = height, mobs=mobs):
+                engine = make_engine(width, height, mobs)
+                ai = farthest_mob(engine).ai
+                player = engine.player
+                return lambda: ai.get_path_to(player.x, player.y)
+
+            yield f"get_path_to[{params}]", bench_path
+
+            def bench_mobs(width: int = width, height: int = height, mobs=mobs):
+                engine = make_engine(width, height, mobs)
+                # every mob is in view, so all of them chase
+                engine.map.visible[:] = True
+                return engine.handle_mob_event
+
+            yield f"handle_mob_event[{params}]", bench_mobs
+
+            def bench_render(width: int = width, height: int = height, mobs=mobs):
+                engine = make_engine(width, height, mobs)
+                engine.map.visible[:] = True
+                console = Console(width, height, order="F")
+                return lambda: engine.map.render(console)
+
+            yield f"GameMap.render[{params}]", bench_render
+
+            def bench_save(width: int = width, height: int = height, mobs=mobs):
+                engine = make_engine(width, height, mobs)
+                path = os.path.join(scratch, "save.sav")
+                return lambda: engine.save_as(path)
+
+            yield f"save_as[{params}]", bench_save
+
+            def bench_load(width: int = width, height: int = height, mobs=mobs):
+                engine = make_engine(width, height, mobs)
+                path = os.path.join(scratch, "load.sav")
+                engine.save_as(path)
+                return lambda: setup_game.load_game(path)
+
+            yield f"load_game[{params}]", bench_load
+
+    for count in [2000, 20000, 200000]:
+
+        def bench_history(count: int = count):
+            log = MessageLog()
+            for i in range(count):
+                log.add_message(
+                    f"Rat attacks Player for {i % 7} damage", color.enemy_atk
+                )
+            console = Console(74, 38, order="F")
+
+            # windows ending at cursors spread over the archived history, the
+            # way the history viewer reads them while scrolling
+            height = console.height
+            archived = log.archive.length
+            cursors = itertools.cycle(range(height, archived, max(archived // 16, 1)))
+
+            def read_window() -> None:
+                cursor = next(cursors)
+                MessageLog.render_messages(
+                    console,
+                    0,
+                    0,
+                    console.width,
+                    height,
+                    log.get_messages(cursor + 1 - height, cursor + 1),
+                )
+
+            return read_window
+
+        yield f"MessageLog.get_messages[messages={count}]", bench_history
+
+
+def measure(
+    setup: Callable[[], Callable[[], object]], repeat: int, min_time: float
+) -> Dict[str, float]:
+    # seconds per call, best and median over `repeat` fresh setups
+    func = setup()
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        if time.perf_counter() - start >= min_time or number >= 1 << 20:
+            break
+        number *= 2
+
+    timings = []
+    for _ in range(repeat):
+        func = setup()
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+
+    return {"min": min(timings), "median": statistics.median(timings), "number": number}
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    threshold: float,
+) -> List[str]:
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result["min"] / baseline[name]["min"]
+        status = "REGRESSION" if ratio > threshold else "ok"
+        print(f"{status:>10} {ratio:6.2f}x  {name}")
+        if ratio > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def parse_sizes(text: str) -> List[Tuple[int, int]]:
+    sizes = []
+    for size in text.split(","):
+        width, height = size.split("x")
+        sizes.append((int(width), int(height)))
+    return sizes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=parse_sizes, default=SIZES, help="e.g. 80x43,160x86"
+    )
+    parser.add_argument(
+        "--entities",
+        type=lambda text: [int(count) for count in text.split(",")],
+        default=ENTITY_COUNTS,
+        help="e.g. 10,100",
+    )
+    parser.add_argument("--filter", default="", help="only run cases containing this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.05)
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--save-baseline", help="write results as the new baseline")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    args = parser.parse_args()
+
+    results: Dict[str, Dict[str, float]] = {}
+    with tempfile.TemporaryDirectory() as scratch:
+        for name, setup in cases(args.sizes, args.entities, scratch):
+            if args.filter not in name:
+                continue
+            results[name] = measure(setup, args.repeat, args.min_time)
+            print(f"{results[name]['min'] * 1e6:12.1f} us  {name}", file=sys.stderr)
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
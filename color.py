@@ -24,3 +24,5 @@ bar_empty = (0x40, 0x10, 0x10)
 
 menu_title = (255, 255, 64)
 menu_text = white
+
+perf_text = (0xA0, 0xFF, 0xA0)
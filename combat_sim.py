@@ -0,0 +1,294 @@
+"""Monte Carlo simulation of room encounters, for tuning monster stats.
+
+An encounter is the player fighting, one after another, the monsters that
+procgen.place_entities would put in a single room on a given floor. Fights
+follow MeleeAction: the player hits first for power - defense, then the
+monster hits back, hp is clamped at zero and healing potions are drunk at a
+third of max hp, costing the player's attack for that turn. Every encounter
+is simulated at once with numpy, so millions take seconds.
+
+    python combat_sim.py --encounters 1000000 --floors 1-8 --potions 1
+    python combat_sim.py --verify 500
+
+--verify plays the same encounters through the real engine and checks that
+both end with the same hp.
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import csv
+import itertools
+import sys
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from actions import ItemAction, MeleeAction
+from engine import Engine
+import entity_factory
+from entity import Actor, Item
+from map import GameMap
+import procgen
+import tile_types
+
+# a fight where neither side can hurt the other is called off after this
+MAX_EXCHANGES = 200
+
+WEAPONS: Dict[str, Optional[Item]] = {
+    "none": None,
+    "stick": entity_factory.stick,
+    "knife": entity_factory.knife,
+}
+ARMOR: Dict[str, Optional[Item]] = {
+    "none": None,
+    "shield": entity_factory.shield,
+    "big_shield": entity_factory.big_shield,
+}
+
+
+class Gear(NamedTuple):
+    weapon: str
+    armor: str
+
+    def items(self) -> List[Item]:
+        return [item for item in (WEAPONS[self.weapon], ARMOR[self.armor]) if item]
+
+
+class Encounters(NamedTuple):
+    # monster_types indexes into monster_kinds, -1 where there is no monster
+    monster_types: np.ndarray
+    monster_kinds: List[Actor]
+
+
+def floor_monsters(floor: int) -> Tuple[List[Actor], np.ndarray]:
+    # the same weights procgen.get_random_entity uses for this floor
+    chances: Dict[Actor, int] = {}
+    for min_floor, values in procgen.enemy_chances.items():
+        if min_floor > floor:
+            break
+        for entity, weight in values:
+            chances[entity] = weight
+    kinds = list(chances)
+    weights = np.array([chances[kind] for kind in kinds], dtype=float)
+    return kinds, weights / weights.sum()
+
+
+def sample_encounters(rng: np.random.Generator, floor: int, count: int) -> Encounters:
+    kinds, probabilities = floor_monsters(floor)
+    max_mobs = procgen.get_max_val_for_floor(procgen.max_mobs_floor, floor)
+
+    sizes = rng.integers(0, max_mobs, size=count, endpoint=True)
+    types = rng.choice(len(kinds), size=(count, max(max_mobs, 1)), p=probabilities)
+    types[np.arange(types.shape[1]) >= sizes[:, None]] = -1
+    return Encounters(types, kinds)
+
+
+def player_stats(gear: Gear) -> Tuple[int, int, int]:
+    fighter = entity_factory.player.fighter
+    power = fighter.base_power
+    defense = fighter.base_defense
+    for item in gear.items():
+        assert item.equippable is not None
+        power += item.equippable.power_bonus
+        defense += item.equippable.defense_bonus
+    return fighter.max_hp, power, defense
+
+
+def simulate(encounters: Encounters, gear: Gear, potions: int) -> np.ndarray:
+    """Player hp left after each encounter, 0 for the ones the player lost."""
+    max_hp, power, defense = player_stats(gear)
+    potion = entity_factory.health_potion.consumable
+    heal = getattr(potion, "amount")
+
+    kinds = encounters.monster_kinds
+    kind_hp = np.array([kind.fighter.max_hp for kind in kinds] + [0])
+    kind_power = np.array([kind.fighter.base_power for kind in kinds] + [0])
+    kind_defense = np.array([kind.fighter.base_defense for kind in kinds] + [0])
+
+    # -1 indexes the extra zero entry, so missing monsters have no hp
+    types = encounters.monster_types
+    monster_hp = kind_hp[types]
+    damage_dealt = np.maximum(power - kind_defense[types], 0)
+    damage_taken = np.maximum(kind_power[types] - defense, 0)
+
+    count = len(types)
+    rows = np.arange(count)
+    hp = np.full(count, max_hp)
+    potions_left = np.full(count, potions)
+    current = np.zeros(count, dtype=int)
+    exchanges = np.zeros(count, dtype=int)
+
+    def skip_dead() -> None:
+        # move each encounter on to its next living monster
+        while True:
+            done = current >= types.shape[1]
+            waiting = ~done
+            waiting[waiting] = monster_hp[rows[waiting], current[waiting]] <= 0
+            if not waiting.any():
+                return
+            current[waiting] += 1
+            exchanges[waiting] = 0
+
+    skip_dead()
+    while True:
+        fighting = (current < types.shape[1]) & (hp > 0)
+        if not fighting.any():
+            break
+        index = rows[fighting]
+        target = current[fighting]
+
+        drinks = (hp[index] <= max_hp // 3) & (potions_left[index] > 0)
+        drinking = index[drinks]
+        hp[drinking] = np.minimum(hp[drinking] + heal, max_hp)
+        potions_left[drinking] -= 1
+
+        attacking, attacked = index[~drinks], target[~drinks]
+        monster_hp[attacking, attacked] -= damage_dealt[attacking, attacked]
+
+        # monsters still standing hit back
+        alive = monster_hp[index, target] > 0
+        hit, by = index[alive], target[alive]
+        hp[hit] = np.maximum(hp[hit] - damage_taken[hit, by], 0)
+
+        exchanges[index] += 1
+        # like the engine check, a stalled fight moves on to the next monster
+        stalled = exchanges[index] >= MAX_EXCHANGES
+        monster_hp[index[stalled], target[stalled]] = 0
+
+        skip_dead()
+
+    return hp
+
+
+class Row(NamedTuple):
+    floor: int
+    weapon: str
+    armor: str
+    potions: int
+    encounters: int
+    win_rate: float
+    expected_hp_loss: float
+
+
+def run_table(
+    floors: Sequence[int], potions: int, encounters: int, seed: int
+) -> Iterator[Row]:
+    rng = np.random.default_rng(seed)
+    max_hp = entity_factory.player.fighter.max_hp
+    for floor in floors:
+        # every gear combination fights the same rooms
+        sample = sample_encounters(rng, floor, encounters)
+        for weapon, armor in itertools.product(WEAPONS, ARMOR):
+            hp = simulate(sample, Gear(weapon, armor), potions)
+            yield Row(
+                floor,
+                weapon,
+                armor,
+                potions,
+                encounters,
+                round(float((hp > 0).mean()), 4),
+                round(float((max_hp - hp).mean()), 3),
+            )
+
+
+def play_encounter(encounters: Encounters, index: int, gear: Gear, potions: int) -> int:
+    """Play one sampled encounter through the engine, returning the hp left."""
+    player = copy.deepcopy(entity_factory.player)
+    engine = Engine(player=player)
+    gamemap = GameMap(engine, 5, 3, entities=[player])
+    gamemap.tiles[:] = tile_types.floor
+    gamemap.rehash_tiles()
+    engine.map = gamemap
+    player.place(1, 1, gamemap)
+
+    for prototype in gear.items() + [entity_factory.health_potion] * potions:
+        item = copy.deepcopy(prototype)
+        item.parent = player.inventory
+        player.inventory.items.append(item)
+        if item.equippable:
+            player.equipment.toggle_equip(item, add_message=False)
+
+    for kind in encounters.monster_types[index]:
+        if kind < 0:
+            continue
+        monster = encounters.monster_kinds[kind].spawn(gamemap, 2, 1)
+        for _ in range(MAX_EXCHANGES):
+            if not monster.is_alive or not player.is_alive:
+                break
+            fighter = player.fighter
+            potion = next(
+                (item for item in player.inventory.items if item.consumable), None
+            )
+            if fighter.hp <= fighter.max_hp // 3 and potion is not None:
+                engine.handle_player_turn(ItemAction(player, potion))
+            else:
+                engine.handle_player_turn(MeleeAction(player, 1, 0))
+        if not player.is_alive:
+            return 0
+        # make room for the next monster, as if it walked in
+        gamemap.entities.discard(monster)
+
+    return player.fighter.hp
+
+
+def verify(samples: int, seed: int, floors: Sequence[int], potions: int) -> int:
+    # returns the number of encounters where the engine and simulation differ
+    rng = np.random.default_rng(seed)
+    mismatches = 0
+    for floor in floors:
+        sample = sample_encounters(rng, floor, samples)
+        for weapon, armor in itertools.product(WEAPONS, ARMOR):
+            gear = Gear(weapon, armor)
+            simulated = simulate(sample, gear, potions)
+            for index in range(samples):
+                played = play_encounter(sample, index, gear, potions)
+                if played != simulated[index]:
+                    mismatches += 1
+                    print(
+                        f"floor {floor} {gear} encounter {index}: engine {played}, "
+                        f"simulation {simulated[index]}",
+                        file=sys.stderr,
+                    )
+    return mismatches
+
+
+def parse_floors(text: str) -> List[int]:
+    first, _, last = text.partition("-")
+    return list(range(int(first), int(last or first) + 1))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--encounters", type=int, default=100000)
+    parser.add_argument("--floors", type=parse_floors, default=parse_floors("1-8"))
+    parser.add_argument("--potions", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="-", help="CSV file, or - for stdout")
+    parser.add_argument(
+        "--verify",
+        metavar="N",
+        type=int,
+        help="check N encounters per floor and gear against the engine instead",
+    )
+    args = parser.parse_args()
+
+    if args.verify:
+        mismatches = verify(args.verify, args.seed, args.floors, args.potions)
+        print(f"{mismatches} mismatches")
+        sys.exit(1 if mismatches else 0)
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", newline="")
+    try:
+        writer = csv.writer(out)
+        writer.writerow(Row._fields)
+        for row in run_table(args.floors, args.potions, args.encounters, args.seed):
+            writer.writerow(row)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,56 @@
 from __future__ import annotations
 
-from typing import List, Tuple, Optional, TYPE_CHECKING
+from typing import Dict, List, Tuple, Optional, TYPE_CHECKING
 
 import numpy as np
 import random
 import tcod
 
 from actions import Action, BumpAction, MeleeAction, MovementAction, WaitAction
+from components.status_effects import Confusion
+from metrics import registry as metrics
 
 if TYPE_CHECKING:
     from entity import Actor
 
 
+DIRECTIONS = [(-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1)]
+
+
 class BaseAi(Action):
     entity: Actor
 
     def perform(self) -> None:
         raise NotImplementedError()
 
-    def get_path_to(self, dest_x: int, dest_y: int) -> List[Tuple[int, int]]:
-        # path to target position, if none, return empty list
-        cost = np.array(self.entity.gamemap.tiles["walkable"], dtype=np.int8)
+    def plan(self, cost: np.ndarray) -> None:
+        """Work out what to do this turn, before any mob has moved.
+
+        The engine plans every mob on a thread pool before performing them
+        one by one, so this must only read the game state and write to the
+        AI itself. cost is the map's path_cost at the start of the turn.
+        """
 
-        for entity in self.entity.gamemap.entities:
-            if entity.blocks_movement and cost[entity.x, entity.y]:
-                cost[entity.x, entity.y] += 10
+    def plan_priority(self) -> Optional[float]:
+        # None when plan has nothing to do this turn, otherwise lower values
+        # are planned first when the engine is short on time
+        return None
+
+    def defer(self) -> None:
+        """Called instead of plan when the turn's AI budget ran out."""
+
+    def stumble(self) -> None:
+        # confused actors bump into a random neighbouring cell
+        direction_x, direction_y = random.choice(DIRECTIONS)
+        return BumpAction(self.entity, direction_x, direction_y).perform()
+
+    def get_path_to(
+        self, dest_x: int, dest_y: int, cost: Optional[np.ndarray] = None
+    ) -> List[Tuple[int, int]]:
+        # path to target position, if none, return empty list
+        metrics.count("pathfinder.calls")
+        if cost is None:
+            cost = self.entity.gamemap.path_cost()
 
         graph = tcod.path.SimpleGraph(cost=cost, cardinal=2, diagonal=3)
         pathfinder = tcod.path.Pathfinder(graph)
@@ -33,66 +59,218 @@ class BaseAi(Action):
 
         path: List[List[int]] = pathfinder.path_to((dest_x, dest_y))
 
-        return [(index[0], index[1]) for index in path]
+        # the path starts on the entity's own cell, which isn't a step. Before
+        # it was dropped, chasing mobs lost a turn stepping onto that cell
+        return [(index[0], index[1]) for index in path[1:]]
+
+
+# pack members this close to their flank cell head for it instead of the player
+FLANK_RANGE = 3
+
+
+class Pack:
+    """Blackboard shared by the mobs that spawned together in a room.
+
+    The leader plans for everyone once per turn: a distance map to the target
+    that all members walk down, and a free cell next to the target for each
+    member to close in on, so the pack surrounds the player instead of
+    queueing behind each other.
+    """
+
+    def __init__(self) -> None:
+        self.members: List[HostileEnemy] = []
+        self.target: Optional[Tuple[int, int]] = None
+        self.distance: Optional[np.ndarray] = None
+        # index into members -> the cell next to the target it should take
+        self.flanks: Dict[int, Tuple[int, int]] = {}
+
+    def join(self, ai: HostileEnemy) -> None:
+        ai.pack = self
+        self.members.append(ai)
+
+    @property
+    def active(self) -> List[HostileEnemy]:
+        # dead members have no AI left
+        return [ai for ai in self.members if ai.entity.ai is ai]
+
+    @property
+    def leader(self) -> Optional[HostileEnemy]:
+        active = self.active
+        return active[0] if active else None
+
+    def needs_plan(self) -> bool:
+        # the distance map stays good until the player moves, and is only
+        # worth making while someone can see the player and isn't next to them
+        player = self.members[0].engine.player
+        if self.distance is not None and self.target == (player.x, player.y):
+            return False
+        return any(
+            max(abs(ai.entity.x - player.x), abs(ai.entity.y - player.y)) > 1
+            and ai.sees_player()
+            for ai in self.active
+        )
+
+    def plan(self, cost: np.ndarray) -> None:
+        target = self.members[0].engine.player
+        distance = tcod.path.maxarray(cost.shape, order="F")
+        distance[target.x, target.y] = 0
+        tcod.path.dijkstra2d(distance, cost, 2, 3, out=distance)
+        metrics.count("pathfinder.calls")
+
+        self.target = target.x, target.y
+        self.distance = distance
+        self.assign_flanks(cost)
+
+    def assign_flanks(self, cost: np.ndarray) -> None:
+        assert self.target is not None and self.distance is not None
+        tx, ty = self.target
+        free = [
+            (tx + dx, ty + dy)
+            for dx, dy in DIRECTIONS
+            if 0 <= tx + dx < cost.shape[0]
+            and 0 <= ty + dy < cost.shape[1]
+            and cost[tx + dx, ty + dy] == 1
+        ]
+
+        # whoever is closest picks first
+        self.flanks = {}
+        order = sorted(
+            (int(self.distance[ai.entity.x, ai.entity.y]), index)
+            for index, ai in enumerate(self.members)
+            if ai.entity.ai is ai
+        )
+        for _, index in order:
+            if not free:
+                break
+            entity = self.members[index].entity
+            cell = min(
+                free, key=lambda xy: max(abs(xy[0] - entity.x), abs(xy[1] - entity.y))
+            )
+            free.remove(cell)
+            self.flanks[index] = cell
+
+    def step_for(self, ai: HostileEnemy) -> Optional[Tuple[int, int]]:
+        # the direction that takes this member closer, or None if none does
+        if self.distance is None or self.target is None:
+            return None
+        # the map leads anywhere on the floor, so only members that can see
+        # the player or are close to where it was get to use it
+        if (
+            ai.entity.distance(*self.target) > ai.entity.sight_radius
+            and not ai.sees_player()
+        ):
+            return None
+        distance = self.distance
+        walkable = ai.entity.gamemap.tiles["walkable"]
+        x, y = ai.entity.x, ai.entity.y
+
+        goal = self.flanks.get(self.members.index(ai))
+        near = goal is not None and (
+            max(abs(goal[0] - x), abs(goal[1] - y)) <= FLANK_RANGE
+        )
+
+        def rank(cx: int, cy: int) -> Tuple[int, ...]:
+            if near:
+                assert goal is not None
+                flank = max(abs(goal[0] - cx), abs(goal[1] - cy))
+                return flank, int(distance[cx, cy])
+            return (int(distance[cx, cy]),)
+
+        best = rank(x, y)
+        step = None
+        for dx, dy in DIRECTIONS:
+            cx, cy = x + dx, y + dy
+            if not (0 <= cx < walkable.shape[0] and 0 <= cy < walkable.shape[1]):
+                continue
+            if not walkable[cx, cy]:
+                continue
+            candidate = rank(cx, cy)
+            if candidate < best:
+                best, step = candidate, (dx, dy)
+        return step
 
 
 class HostileEnemy(BaseAi):
+    # set when the mob spawned as part of a group, see procgen.place_entities
+    pack: Optional[Pack] = None
+
     def __init__(self, entity: Actor):
         super().__init__(entity)
         self.path: List[Tuple[int, int]] = []
+        # turns in a row that re-planning was put off to save time
+        self.deferred_turns = 0
+
+    def sees_player(self) -> bool:
+        # the engine traces the lines for every mob at once at the start of a
+        # turn, so this is normally a cache hit
+        target = self.engine.player
+        if self.entity.distance(target.x, target.y) > self.entity.sight_radius:
+            return False
+        origin = (self.entity.x, self.entity.y)
+        return bool(
+            self.entity.gamemap.lines_of_sight([origin], (target.x, target.y))[0]
+        )
+
+    def plan_priority(self) -> Optional[float]:
+        target = self.engine.player
+        distance = max(abs(target.x - self.entity.x), abs(target.y - self.entity.y))
+
+        if self.entity.statuses.has(Confusion):
+            return None
+        if self.pack is not None:
+            # only the leader plans, on behalf of the whole pack
+            if self.pack.leader is not self or not self.pack.needs_plan():
+                return None
+        elif distance <= 1 or not self.sees_player():
+            return None
+        # close mobs matter most, but waiting moves a mob up so none starve
+        return distance - self.deferred_turns
+
+    def plan(self, cost: np.ndarray) -> None:
+        if self.plan_priority() is None:
+            return
+
+        if self.pack is not None:
+            self.pack.plan(cost)
+        else:
+            target = self.engine.player
+            self.path = self.get_path_to(target.x, target.y, cost)
+        self.deferred_turns = 0
+
+    def defer(self) -> None:
+        # keeps walking the cached path towards where the player was
+        self.deferred_turns += 1
 
     def perform(self) -> None:
+        if self.entity.statuses.has(Confusion):
+            return self.stumble()
+
         target = self.engine.player
         dx = target.x - self.entity.x
         dy = target.y - self.entity.y
         distance = max(abs(dx), abs(dy))
 
-        if self.engine.map.visible[self.entity.x, self.entity.y]:
-            if distance <= 1:
-                return MeleeAction(self.entity, dx, dy).perform()
-
-            self.path = self.get_path_to(target.x, target.y)
+        if distance <= 1 and self.sees_player():
+            return MeleeAction(self.entity, dx, dy).perform()
 
         if self.path:
-            dest_x, dest_y = self.path.pop(0)
-            return MovementAction(
+            dest_x, dest_y = self.path[0]
+            # paths were planned before anyone moved, so when a mob earlier in
+            # the turn took this cell, this one waits and tries again next turn
+            MovementAction(
                 self.entity, dest_x - self.entity.x, dest_y - self.entity.y
             ).perform()
+            self.path.pop(0)
+            return None
 
-        return WaitAction(self.entity).perform()
-
-
-class ConfusedEnemy(BaseAi):
-    def __init__(
-        self, entity: Actor, previous_ai: Optional[BaseAi], turns_remaining: int
-    ):
-        super().__init__(entity)
-        self.previous_ai = previous_ai
-        self.turns_remaining = turns_remaining
+        if self.pack is not None:
+            step = self.pack.step_for(self)
+            if step is not None:
+                return MovementAction(self.entity, *step).perform()
 
-    def perform(self) -> None:
-        if self.turns_remaining <= 0:
-            self.engine.message_log.add_message(
-                f"The {self.entity.name} is no longer confused."
-            )
-            self.entity.ai = self.previous_ai
-        else:
-            direction_x, direction_y = random.choice(
-                [
-                    (-1, -1),  # Northwest
-                    (0, -1),  # North
-                    (1, -1),  # Northeast
-                    (-1, 0),  # West
-                    (1, 0),  # East
-                    (-1, 1),  # Southwest
-                    (0, 1),  # South
-                    (1, 1),  # Southeast
-                ]
-            )
+        # out of sight with nowhere left to go, so follow the player's scent
+        step = self.entity.gamemap.scent_step(self.entity.x, self.entity.y)
+        if step is not None:
+            return MovementAction(self.entity, *step).perform()
 
-            self.turns_remaining -= 1
-            return BumpAction(
-                self.entity,
-                direction_x,
-                direction_y,
-            ).perform()
+        return WaitAction(self.entity).perform()
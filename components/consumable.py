@@ -5,7 +5,7 @@ from typing import Optional, TYPE_CHECKING
 import actions
 import color
 import components.inventory
-import components.ai
+from components.status_effects import Confusion, Haste, Poison, Regeneration
 from components.base_component import BaseComponent
 from entity import Actor
 from exceptions import Impossible
@@ -75,7 +75,7 @@ class LightningConsumable(Consumable):
             self.engine.message_log.add_message(
                 f"You zap {target.name} for {self.damage} damage."
             )
-            target.fighter.take_damage(self.damage)
+            target.fighter.take_damage(self.damage, source=self.parent.name)
             self.consume()
         else:
             raise Impossible("No enemies to zap.")
@@ -109,9 +109,73 @@ class ConfusionConsumable(Consumable):
             f"You've confused {target.name}.", color.status_effect_applied
         )
 
-        target.ai = components.ai.ConfusedEnemy(
-            entity=target, previous_ai=target.ai, turns_remaining=self.number_turns
+        target.statuses.apply(Confusion(self.number_turns))
+        self.consume()
+
+
+class PoisonConsumable(Consumable):
+    def __init__(self, damage: int, number_turns: int) -> None:
+        self.damage = damage
+        self.number_turns = number_turns
+
+    def get_action(self, consumer: Actor) -> SingleRangedAttackHandler:
+        self.engine.message_log.add_message(
+            "Select target location.", color.needs_target
+        )
+        return SingleRangedAttackHandler(
+            self.engine,
+            callback=lambda xy: actions.ItemAction(consumer, self.parent, xy),
+        )
+
+    def activate(self, action: actions.ItemAction) -> None:
+        consumer = action.entity
+        target = action.target_actor
+
+        if not self.engine.map.visible[action.target_xy]:
+            raise Impossible("Can't target out of FOV.")
+        if not target:
+            raise Impossible("You must select an enemy.")
+        if target is consumer:
+            raise Impossible("You can't use that on yourself.")
+
+        self.engine.message_log.add_message(
+            f"You've poisoned {target.name}.", color.status_effect_applied
+        )
+
+        target.statuses.apply(Poison(self.number_turns, self.damage))
+        self.consume()
+
+
+class RegenerationConsumable(Consumable):
+    def __init__(self, amount: int, number_turns: int) -> None:
+        self.amount = amount
+        self.number_turns = number_turns
+
+    def activate(self, action: actions.ItemAction) -> None:
+        consumer = action.entity
+
+        self.engine.message_log.add_message(
+            f"You consume the {self.parent.name}, and start to regenerate.",
+            color.status_effect_applied,
         )
+
+        consumer.statuses.apply(Regeneration(self.number_turns, self.amount))
+        self.consume()
+
+
+class HasteConsumable(Consumable):
+    def __init__(self, number_turns: int) -> None:
+        self.number_turns = number_turns
+
+    def activate(self, action: actions.ItemAction) -> None:
+        consumer = action.entity
+
+        self.engine.message_log.add_message(
+            f"You consume the {self.parent.name}, and speed up.",
+            color.status_effect_applied,
+        )
+
+        consumer.statuses.apply(Haste(self.number_turns))
         self.consume()
 
 
@@ -142,7 +206,7 @@ class BombConsumable(Consumable):
                 self.engine.message_log.add_message(
                     f"You exploded {actor.name} for {self.damage} damage!"
                 )
-                actor.fighter.take_damage(self.damage)
+                actor.fighter.take_damage(self.damage, source=self.parent.name)
                 targets_hit = True
 
         if not targets_hit:
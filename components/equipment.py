@@ -1,9 +1,8 @@
 from __future__ import annotations
 
-from typing import Optional, TYPE_CHECKING
+from typing import Dict, Iterable, Optional, TYPE_CHECKING
 
 from components.base_component import BaseComponent
-from equipment_types import EquipmentType
 
 if TYPE_CHECKING:
     from entity import Actor, Item
@@ -12,36 +11,37 @@ if TYPE_CHECKING:
 class Equipment(BaseComponent):
     parent: Actor
 
-    def __init__(self, weapon: Optional[Item] = None, shield: Optional[Item] = None):
-        self.weapon = weapon
-        self.shield = shield
+    def __init__(self, slots: Iterable[str] = ("weapon", "shield")) -> None:
+        # slot name -> the item in it. Items for a slot that isn't listed
+        # here get one made for them when they are equipped
+        self.slots: Dict[str, Optional[Item]] = {slot: None for slot in slots}
 
     @property
-    def defense_bonus(self) -> int:
-        bonus = 0
-
-        if self.weapon is not None and self.weapon.equippable is not None:
-            bonus += self.weapon.equippable.defense_bonus
+    def weapon(self) -> Optional[Item]:
+        return self.slots.get("weapon")
 
-        if self.shield is not None and self.shield.equippable is not None:
-            bonus += self.shield.equippable.defense_bonus
+    @property
+    def shield(self) -> Optional[Item]:
+        return self.slots.get("shield")
 
-        return bonus
+    @property
+    def defense_bonus(self) -> int:
+        return sum(
+            item.equippable.defense_bonus
+            for item in self.slots.values()
+            if item is not None and item.equippable is not None
+        )
 
     @property
     def power_bonus(self) -> int:
-        bonus = 0
-
-        if self.weapon is not None and self.weapon.equippable is not None:
-            bonus += self.weapon.equippable.power_bonus
-
-        if self.shield is not None and self.shield.equippable is not None:
-            bonus += self.shield.equippable.power_bonus
-
-        return bonus
+        return sum(
+            item.equippable.power_bonus
+            for item in self.slots.values()
+            if item is not None and item.equippable is not None
+        )
 
     def item_is_equipped(self, item: Item) -> bool:
-        return self.weapon == item or self.shield == item
+        return any(equipped == item for equipped in self.slots.values())
 
     def unequip_message(self, item_name: str) -> None:
         self.parent.gamemap.engine.message_log.add_message(
@@ -54,34 +54,32 @@ class Equipment(BaseComponent):
         )
 
     def equip_to_slot(self, slot: str, item: Item, add_message: bool) -> None:
-        current_item = getattr(self, slot)
+        current_item = self.slots.get(slot)
 
         if current_item is not None:
             self.unequip_from_slot(slot, add_message)
 
-        setattr(self, slot, item)
+        self.slots[slot] = item
+        self.parent.fighter.invalidate_stats()
 
         if add_message:
             self.equip_message(item.name)
 
     def unequip_from_slot(self, slot: str, add_message: bool) -> None:
-        current_item = getattr(self, slot)
+        current_item = self.slots.get(slot)
 
-        if add_message:
+        if add_message and current_item is not None:
             self.unequip_message(current_item.name)
 
-        setattr(self, slot, None)
+        self.slots[slot] = None
+        self.parent.fighter.invalidate_stats()
 
     def toggle_equip(self, equippable_item: Item, add_message: bool = True) -> None:
-        if (
-            equippable_item.equippable
-            and equippable_item.equippable.type == EquipmentType.WEAPON
-        ):
-            slot = "weapon"
-        else:
-            slot = "shield"
+        if equippable_item.equippable is None:
+            return
+        slot = equippable_item.equippable.slot
 
-        if getattr(self, slot) == equippable_item:
+        if self.slots.get(slot) == equippable_item:
             self.unequip_from_slot(slot, add_message)
         else:
             self.equip_to_slot(slot, equippable_item, add_message)
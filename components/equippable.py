@@ -1,9 +1,9 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import Optional, TYPE_CHECKING
 
 from components.base_component import BaseComponent
-from equipment_types import EquipmentType
+from equipment_types import DEFAULT_SLOTS, EquipmentType
 
 if TYPE_CHECKING:
     from entity import Item
@@ -13,11 +13,17 @@ class Equippable(BaseComponent):
     parent: Item
 
     def __init__(
-        self, type: EquipmentType, power_bonus: int = 0, defense_bonus: int = 0
+        self,
+        type: EquipmentType,
+        power_bonus: int = 0,
+        defense_bonus: int = 0,
+        slot: Optional[str] = None,
     ) -> None:
         self.type = type
         self.power_bonus = power_bonus
         self.defense_bonus = defense_bonus
+        # name of the Equipment slot this goes in
+        self.slot = slot or DEFAULT_SLOTS[type]
 
 
 class Stick(Equippable):
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import Optional, TYPE_CHECKING
 import color
 
 from components.base_component import BaseComponent
@@ -12,6 +12,11 @@ if TYPE_CHECKING:
 
 class Fighter(BaseComponent):
     parent: Actor
+    # name of whatever last hurt this fighter, used to report causes of death
+    last_damaged_by: Optional[str] = None
+    # derived stats, worked out on first use after invalidate_stats
+    _power: Optional[int] = None
+    _defense: Optional[int] = None
 
     def __init__(self, hp: int, base_defense: int, base_power: int) -> None:
         self.max_hp = hp
@@ -28,28 +33,38 @@ class Fighter(BaseComponent):
         self._hp = max(0, min(value, self.max_hp))
         if self._hp == 0 and self.parent.ai:
             self.die()
+        self.parent.rehash()
 
     @property
     def defense(self) -> int:
-        return self.base_defense + self.defense_bonus
+        if self._defense is None:
+            self._defense = self.base_defense + self.defense_bonus
+        return self._defense
 
     @property
     def power(self) -> int:
-        return self.base_power + self.power_bonus
+        if self._power is None:
+            self._power = self.base_power + self.power_bonus
+        return self._power
 
     @property
     def defense_bonus(self) -> int:
+        bonus = sum(effect.defense_bonus for effect in self.parent.statuses.active)
         if self.parent.equipment:
-            return self.parent.equipment.defense_bonus
-        else:
-            return 0
+            bonus += self.parent.equipment.defense_bonus
+        return bonus
 
     @property
     def power_bonus(self) -> int:
+        bonus = sum(effect.power_bonus for effect in self.parent.statuses.active)
         if self.parent.equipment:
-            return self.parent.equipment.power_bonus
-        else:
-            return 0
+            bonus += self.parent.equipment.power_bonus
+        return bonus
+
+    def invalidate_stats(self) -> None:
+        # call after changing base stats, equipment or status effects
+        self._power = None
+        self._defense = None
 
     def heal(self, amount: int) -> int:
         if self.hp == self.max_hp:
@@ -66,7 +81,8 @@ class Fighter(BaseComponent):
 
         return recovered
 
-    def take_damage(self, amount: int) -> None:
+    def take_damage(self, amount: int, source: Optional[str] = None) -> None:
+        self.last_damaged_by = source
         self.hp -= amount
 
     def die(self) -> None:
@@ -81,6 +97,7 @@ class Fighter(BaseComponent):
         self.parent.color = (191, 0, 0)
         self.parent.blocks_movement = False
         self.parent.ai = None
+        self.parent.statuses.clear()
         self.parent.name = f"Remains of {self.parent.name}"
         self.parent.render_order = RenderOrder.CORPSE
 
@@ -57,10 +57,12 @@ class Level(BaseComponent):
 
     def increase_power(self, amount: int = 1) -> None:
         self.parent.fighter.base_power += amount
+        self.parent.fighter.invalidate_stats()
         self.engine.message_log.add_message(f"Power +{amount}!")
         self.increase_lvl()
 
     def increase_defense(self, amount: int = 1) -> None:
         self.parent.fighter.base_defense += amount
+        self.parent.fighter.invalidate_stats()
         self.engine.message_log.add_message(f"Defense +{amount}!")
         self.increase_lvl()
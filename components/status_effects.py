@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+from typing import List, Optional, Type, TYPE_CHECKING
+
+from components.base_component import BaseComponent
+
+if TYPE_CHECKING:
+    from entity import Actor
+    from timer_wheel import Timer
+
+
+class StatusEffect:
+    """Something that happens to an actor for a number of turns.
+
+    The engine's timer wheel calls on_pulse every `interval` turns for
+    effects that have one, and on_expire once `duration` turns have passed.
+    Effects of the same kind stack, each running its own timers.
+    """
+
+    name = "affected"
+    # turns between on_pulse calls, None for effects that only expire
+    interval: Optional[int] = None
+    # added to the actor's stats while the effect lasts
+    power_bonus = 0
+    defense_bonus = 0
+
+    def __init__(self, duration: int) -> None:
+        self.duration = duration
+        self.actor: Optional[Actor] = None
+        # turn of the engine's timer wheel when this effect runs out
+        self.expires = 0
+        self.expiry: Optional[Timer] = None
+        self.pulse: Optional[Timer] = None
+
+    def on_apply(self) -> None:
+        pass
+
+    def on_pulse(self) -> None:
+        pass
+
+    def on_expire(self) -> None:
+        pass
+
+
+class Confusion(StatusEffect):
+    name = "confused"
+
+    def on_expire(self) -> None:
+        assert self.actor is not None
+        self.actor.gamemap.engine.message_log.add_message(
+            f"The {self.actor.name} is no longer confused."
+        )
+
+
+class Poison(StatusEffect):
+    name = "poisoned"
+    interval = 1
+
+    def __init__(self, duration: int, damage: int) -> None:
+        super().__init__(duration)
+        self.damage = damage
+
+    def on_pulse(self) -> None:
+        assert self.actor is not None
+        self.actor.fighter.take_damage(self.damage, source="poison")
+
+
+class Regeneration(StatusEffect):
+    name = "regenerating"
+    interval = 1
+
+    def __init__(self, duration: int, amount: int) -> None:
+        super().__init__(duration)
+        self.amount = amount
+
+    def on_pulse(self) -> None:
+        assert self.actor is not None
+        self.actor.fighter.heal(self.amount)
+
+
+class Haste(StatusEffect):
+    # the engine gives hasted actors a second action every turn
+    name = "hasted"
+
+
+class StatusEffects(BaseComponent):
+    parent: Actor
+
+    def __init__(self) -> None:
+        # in the order they were applied
+        self.active: List[StatusEffect] = []
+
+    def has(self, kind: Type[StatusEffect]) -> bool:
+        return any(isinstance(effect, kind) for effect in self.active)
+
+    def apply(self, effect: StatusEffect) -> None:
+        timers = self.engine.timers
+        effect.actor = self.parent
+        effect.expires = timers.now + effect.duration
+        effect.expiry = timers.schedule(effect.duration, (effect, False))
+        if effect.interval is not None:
+            effect.pulse = timers.schedule(effect.interval, (effect, True))
+
+        self.active.append(effect)
+        self.parent.fighter.invalidate_stats()
+        effect.on_apply()
+        self.parent.rehash()
+
+    def remove(self, effect: StatusEffect) -> None:
+        for timer in (effect.expiry, effect.pulse):
+            if timer is not None:
+                timer.cancel()
+        effect.expiry = effect.pulse = None
+        self.active.remove(effect)
+        self.parent.fighter.invalidate_stats()
+        self.parent.rehash()
+
+    def clear(self) -> None:
+        for effect in list(self.active):
+            self.remove(effect)
@@ -0,0 +1,144 @@
+"""Generate many dungeon floors in parallel and save statistics about them.
+
+Each (seed, floor) pair is generated with GameWorld.generate_floor, the same
+way a game reaches that floor, and measured without being played. The
+result is a compressed numpy .npz file with one column per statistic and a
+row per floor, and a summary per floor number is printed:
+
+    python dungeon_stats.py --seeds 2000 --floors 1-10 --output floors.npz
+
+Load it with numpy.load(path), e.g. data["rooms"][data["floor"] == 3].
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import multiprocessing
+import os
+import random
+from typing import Dict, List, Tuple
+
+import numpy as np
+import tcod
+
+from engine import Engine
+import entity_factory
+from map import GameWorld
+import map_settings
+import procgen
+
+# entity names from the spawn tables, each counted in its own column
+MONSTER_NAMES = sorted(
+    {entity.name for values in procgen.enemy_chances.values() for entity, _ in values}
+)
+ITEM_NAMES = sorted(
+    {entity.name for values in procgen.item_chances.values() for entity, _ in values}
+)
+
+
+def column_name(prefix: str, name: str) -> str:
+    return prefix + name.lower().replace(" ", "_")
+
+
+COLUMNS = (
+    ["seed", "floor", "rooms", "walkable", "corridor", "stairs_distance"]
+    + [column_name("monster_", name) for name in MONSTER_NAMES]
+    + [column_name("item_", name) for name in ITEM_NAMES]
+)
+
+
+def measure_floor(job: Tuple[int, int]) -> List[int]:
+    seed, floor = job
+    random.seed(f"{seed}:{floor}")
+
+    engine = Engine(player=copy.deepcopy(entity_factory.player))
+    engine.world = GameWorld(
+        engine=engine,
+        max_rooms=map_settings.MAX_ROOMS,
+        room_min_size=map_settings.ROOM_MIN_SIZE,
+        room_max_size=map_settings.ROOM_MAX_SIZE,
+        map_width=map_settings.MAP_WIDTH,
+        map_height=map_settings.MAP_HEIGHT,
+        current_floor=floor - 1,
+    )
+    engine.world.generate_floor()
+    gamemap = engine.map
+    walkable = gamemap.tiles["walkable"]
+
+    # corridors are the walkable cells no room was carved over
+    in_room = np.zeros_like(walkable)
+    for room in gamemap.rooms:
+        in_room[room.inner] = True
+
+    # steps from the spawn point to the stairs, moving diagonally too
+    player = engine.player
+    distance = tcod.path.maxarray(walkable.shape, order="F")
+    distance[player.x, player.y] = 0
+    tcod.path.dijkstra2d(distance, walkable.astype(np.int8), 1, 1, out=distance)
+    stairs = int(distance[gamemap.downstairs_loc])
+    if stairs == np.iinfo(distance.dtype).max:
+        stairs = -1
+
+    counts: Dict[str, int] = {}
+    for entity in gamemap.entities:
+        if entity is not player:
+            counts[entity.name] = counts.get(entity.name, 0) + 1
+
+    return (
+        [
+            seed,
+            floor,
+            len(gamemap.rooms),
+            int(walkable.sum()),
+            int((walkable & ~in_room).sum()),
+            stairs,
+        ]
+        + [counts.get(name, 0) for name in MONSTER_NAMES]
+        + [counts.get(name, 0) for name in ITEM_NAMES]
+    )
+
+
+def parse_floors(text: str) -> List[int]:
+    first, _, last = text.partition("-")
+    return list(range(int(first), int(last or first) + 1))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seeds", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0, help="first seed")
+    parser.add_argument("--floors", type=parse_floors, default=parse_floors("1-10"))
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--output", default="floors.npz")
+    args = parser.parse_args()
+
+    jobs = [
+        (seed, floor)
+        for seed in range(args.seed, args.seed + args.seeds)
+        for floor in args.floors
+    ]
+
+    # floors take about the same time, so big chunks cut the overhead
+    with multiprocessing.Pool(args.workers) as pool:
+        rows = pool.map(measure_floor, jobs, chunksize=64)
+
+    table = np.array(rows, dtype=np.int32)
+    np.savez_compressed(
+        args.output,
+        **{name: table[:, index] for index, name in enumerate(COLUMNS)},
+    )
+    print(f"Wrote {len(rows)} floors to {args.output}")
+
+    # mean of every statistic, one column per floor number
+    floors = table[:, 1]
+    means = [table[floors == floor, 2:].mean(axis=0) for floor in args.floors]
+    width = max(len(name) for name in COLUMNS)
+    print(f"{'floor':<{width}} " + " ".join(f"{floor:>7}" for floor in args.floors))
+    for index, name in enumerate(COLUMNS[2:]):
+        values = " ".join(f"{floor_means[index]:7.2f}" for floor_means in means)
+        print(f"{name:<{width}} {values}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,59 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from concurrent.futures import ThreadPoolExecutor
+import os
+import time
+from typing import List, Optional, TYPE_CHECKING
 
 from tcod.console import Console
 from tcod.map import compute_fov
 import lzma
 import pickle
 
-from render_functions import render_bar, render_names, render_level
+from components.status_effects import Haste
+from render_functions import render_bar, render_names, render_level, render_perf_overlay
 from message_log import MessageLog
 import exceptions
+from metrics import registry as metrics
+from timer_wheel import TimerWheel
+import zobrist
 
 if TYPE_CHECKING:
+    from actions import Action
     from entity import Actor
+    from components.ai import BaseAi
     from map import GameMap, GameWorld
+    from replay import ActionRecorder
+
+
+# tcod releases the GIL while pathfinding, so mobs plan their moves on threads
+AI_THREADS = min(8, os.cpu_count() or 1)
+# below this many mobs, handing plans to the pool costs more than it saves
+PARALLEL_PLAN_MIN = 16
+
+_planning_pool: Optional[ThreadPoolExecutor] = None
+
+
+def planning_pool() -> ThreadPoolExecutor:
+    # shared by every engine in the process, and never pickled with one
+    global _planning_pool
+    if _planning_pool is None:
+        _planning_pool = ThreadPoolExecutor(AI_THREADS, "ai-plan")
+    return _planning_pool
 
 
 class Engine:
     map: GameMap
     world: GameWorld
+    show_perf_overlay = False
+    # seed the game was generated from, if it was started by new_game
+    seed: Optional[int] = None
+    action_recorder: Optional[ActionRecorder] = None
+    # seconds per turn for planning mob moves, None for no limit. Games with
+    # a budget depend on timing, so they can't be replayed from a log
+    ai_budget: Optional[float] = None
+    # set while a hasted player's extra action is still to come this turn
+    haste_pending = False
 
     def __init__(
         self,
@@ -27,6 +62,14 @@ class Engine:
         self.player = player
         self.message_log = MessageLog()
         self.mouse_loc = (0, 0)
+        # counts turns and runs out status effects
+        self.timers = TimerWheel()
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        # the recorder's open file belongs to this session, not the save
+        state.pop("action_recorder", None)
+        return state
 
     def save_as(self, filename: str) -> None:
         # save engine game file
@@ -34,15 +77,122 @@ class Engine:
         with open(filename, "wb") as f:
             f.write(save_data)
 
+    def state_hash(self) -> int:
+        # cheap to call every turn, the map keeps its hash up to date
+        return zobrist.mix(self.map.state_hash ^ self.world.current_floor)
+
+    def handle_player_turn(self, action: Action) -> None:
+        # raises exceptions.Impossible before any mob acts if the action fails
+        with metrics.timer("turn.player_action"):
+            action.perform()
+
+        if self.player.statuses.has(Haste) and not self.haste_pending:
+            # the rest of the world waits for the player's second action
+            self.haste_pending = True
+        else:
+            self.haste_pending = False
+
+            with metrics.timer("turn.scent"):
+                self.map.update_scent(self.player.x, self.player.y)
+
+            with metrics.timer("turn.mobs"):
+                self.handle_mob_event()
+
+            with metrics.timer("turn.effects"):
+                self.tick_effects()
+
+        with metrics.timer("turn.fov"):
+            self.update_fov()
+
+        metrics.count("turns")
+
     def handle_mob_event(self) -> None:
-        for entity in set(self.map.actors) - {self.player}:
-            if entity.ai:
+        # a list keeps the turn order the same every time the game is replayed
+        mobs = [actor for actor in self.map.actors if actor is not self.player]
+
+        # every mob close enough to see the player gets its line traced in
+        # one batch, the AIs then read the cached answers
+        player = self.player
+        self.map.lines_of_sight(
+            [
+                (actor.x, actor.y)
+                for actor in mobs
+                if actor.distance(player.x, player.y) <= actor.sight_radius
+            ],
+            (player.x, player.y),
+        )
+
+        with metrics.timer("turn.mobs.plan"):
+            self.plan_mobs([entity.ai for entity in mobs if entity.ai])
+
+        # moves are applied in turn order, so when two mobs planned to step
+        # into the same cell the first one gets it
+        for entity in mobs:
+            # hasted mobs get a second action
+            actions = 2 if entity.statuses.has(Haste) else 1
+            for _ in range(actions):
+                if not entity.ai:
+                    break
                 try:
-                    entity.ai.perform()
+                    with metrics.timer(f"ai.{type(entity.ai).__name__}"):
+                        entity.ai.perform()
                 except exceptions.Impossible:
                     pass
 
+    def tick_effects(self) -> None:
+        # only the effects with something due this turn are touched
+        fired = self.timers.advance()
+        # pulses go first, so an effect's last pulse lands on its last turn
+        fired.sort(key=lambda entry: not entry[1])
+
+        for effect, is_pulse in fired:
+            actor = effect.actor
+            if actor is None or effect not in actor.statuses.active:
+                # removed earlier this turn, e.g. its actor died
+                continue
+            if is_pulse:
+                assert effect.interval is not None
+                effect.pulse = self.timers.schedule(effect.interval, (effect, True))
+                effect.on_pulse()
+            else:
+                actor.statuses.remove(effect)
+                effect.on_expire()
+
+    def plan_mobs(self, planners: List[BaseAi]) -> None:
+        # plans only read the map, so running them together gives the same
+        # result as running them one after another
+        prioritized = []
+        for index, ai in enumerate(planners):
+            priority = ai.plan_priority()
+            if priority is not None:
+                prioritized.append((priority, index, ai))
+        if not prioritized:
+            return
+
+        # most urgent first, so the budget runs out on the mobs that matter least
+        prioritized.sort(key=lambda entry: entry[:2])
+        cost = self.map.path_cost()
+        deadline = None
+        if self.ai_budget is not None:
+            deadline = time.perf_counter() + self.ai_budget
+
+        def plan(ai: BaseAi) -> None:
+            if deadline is not None and time.perf_counter() > deadline:
+                metrics.count("ai.deferred")
+                ai.defer()
+            else:
+                ai.plan(cost)
+
+        ordered = [ai for _, _, ai in prioritized]
+        if AI_THREADS > 1 and len(ordered) >= PARALLEL_PLAN_MIN:
+            for _ in planning_pool().map(plan, ordered):
+                pass
+        else:
+            for ai in ordered:
+                plan(ai)
+
     def update_fov(self) -> None:
+        metrics.count("fov.recomputes")
         self.map.visible[:] = compute_fov(
             self.map.tiles["transparent"], (self.player.x, self.player.y), radius=8
         )
@@ -50,17 +200,23 @@ class Engine:
         self.map.explored |= self.map.visible
 
     def render(self, console: Console) -> None:
-        self.map.render(console)
+        with metrics.timer("render"):
+            self.map.render(console)
 
-        self.message_log.render(console=console, x=21, y=42, width=45, height=6)
+            self.message_log.render(console=console, x=21, y=42, width=45, height=6)
 
-        render_bar(
-            console=console,
-            cur_val=self.player.fighter.hp,
-            max_val=self.player.fighter.max_hp,
-            total_width=20,
-        )
+            render_bar(
+                console=console,
+                cur_val=self.player.fighter.hp,
+                max_val=self.player.fighter.max_hp,
+                total_width=20,
+            )
+
+            render_level(
+                console=console, level=self.world.current_floor, location=(0, 47)
+            )
 
-        render_level(console=console, level=self.world.current_floor, location=(0, 47))
+            render_names(console=console, engine=self)
 
-        render_names(console=console, engine=self)
+        if self.show_perf_overlay:
+            render_perf_overlay(console=console, engine=self)
@@ -4,6 +4,7 @@ import copy
 import math
 from typing import Optional, Tuple, Type, TypeVar, TYPE_CHECKING, Union
 
+from components.status_effects import StatusEffects
 from render_order import RenderOrder
 
 if TYPE_CHECKING:
@@ -72,6 +73,8 @@ class Entity:
                     self.parent.entities.remove(self)
             self.parent = map
             map.entities.add(self)
+        else:
+            self.rehash()
 
     def distance(self, x: int, y: int) -> float:
         return math.sqrt((x - self.x) ** 2 + (y - self.y) ** 2)
@@ -79,6 +82,13 @@ class Entity:
     def move(self, dx: int, dy: int) -> None:
         self.x += dx
         self.y += dy
+        self.rehash()
+
+    def rehash(self) -> None:
+        # call after changing anything that goes into the map's state hash
+        entities = getattr(getattr(self, "parent", None), "entities", None)
+        if entities is not None:
+            entities.rehash(self)
 
 
 class Actor(Entity):
@@ -95,6 +105,7 @@ class Actor(Entity):
         equipment: Equipment,
         inventory: Inventory,
         level: Level,
+        sight_radius: int = 8,
     ):
         super().__init__(
             x=x,
@@ -117,6 +128,12 @@ class Actor(Entity):
         self.equipment: Equipment = equipment
         self.equipment.parent = self
 
+        # how far this actor can see, if nothing is in the way
+        self.sight_radius = sight_radius
+
+        self.statuses = StatusEffects()
+        self.statuses.parent = self
+
     @property
     def is_alive(self) -> bool:
         return bool(self.ai)
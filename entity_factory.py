@@ -5,6 +5,9 @@ from components.consumable import (
     LightningConsumable,
     ConfusionConsumable,
     BombConsumable,
+    PoisonConsumable,
+    RegenerationConsumable,
+    HasteConsumable,
 )
 from components.ai import HostileEnemy
 from components.fighter import Fighter
@@ -33,6 +36,7 @@ rat = Actor(
     inventory=Inventory(capacity=0),
     level=Level(xp_given=35),
     equipment=Equipment(),
+    sight_radius=8,
 )
 
 frog = Actor(
@@ -44,6 +48,7 @@ frog = Actor(
     inventory=Inventory(capacity=0),
     level=Level(xp_given=100),
     equipment=Equipment(),
+    sight_radius=6,
 )
 
 demon_rat = Actor(
@@ -55,6 +60,7 @@ demon_rat = Actor(
     inventory=Inventory(capacity=0),
     level=Level(xp_given=35),
     equipment=Equipment(),
+    sight_radius=10,
 )
 
 demon_frog = Actor(
@@ -66,6 +72,7 @@ demon_frog = Actor(
     inventory=Inventory(capacity=0),
     level=Level(xp_given=35),
     equipment=Equipment(),
+    sight_radius=8,
 )
 
 health_potion = Item(
@@ -96,6 +103,27 @@ bomb = Item(
     consumable=BombConsumable(damage=12, radius=3),
 )
 
+poison_vial = Item(
+    char="!",
+    color=(63, 191, 0),
+    name="Poison Vial",
+    consumable=PoisonConsumable(damage=2, number_turns=6),
+)
+
+regeneration_potion = Item(
+    char="+",
+    color=(0, 255, 127),
+    name="Regeneration Pot",
+    consumable=RegenerationConsumable(amount=1, number_turns=10),
+)
+
+haste_potion = Item(
+    char="+",
+    color=(255, 191, 0),
+    name="Haste Pot",
+    consumable=HasteConsumable(number_turns=8),
+)
+
 stick = Item(
     char="/",
     color=(0, 191, 255),
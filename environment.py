@@ -0,0 +1,374 @@
+"""Gym style environments for training agents on the game.
+
+RoguelikeEnv wraps a single HeadlessEngine, and VectorEnv steps many of them
+as one batch. Observations are numpy arrays built straight from the map and
+entity state rather than from rendered consoles:
+
+    "map"    float32 (layers, width, height), one channel per MAP_LAYERS entry
+    "stats"  float32 (len(STATS),) player stats, see STATS
+
+Only what the player could know is observed: tiles are masked to explored
+cells, and monsters and items to the cells currently in view.
+
+Actions are integers: 0 waits, 1-8 move or attack in a MOVE_DIRECTIONS
+direction, 9 picks up, 10 takes the stairs, and USE_ITEM + i uses or equips
+inventory slot i. Targeted items are aimed at the closest visible enemy.
+
+Rewards are 1 per floor descended, KILL_REWARD per monster killed and -1 for
+dying. Run the module directly to measure steps per second:
+
+    python environment.py --envs 16 --steps 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from typing import Dict, List, Optional, Sequence, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+from actions import (
+    Action,
+    BumpAction,
+    DescendAction,
+    EquipAction,
+    ItemAction,
+    PickupAction,
+    WaitAction,
+)
+from components.consumable import (
+    BombConsumable,
+    ConfusionConsumable,
+    PoisonConsumable,
+)
+from headless import HeadlessEngine
+
+if TYPE_CHECKING:
+    from engine import Engine
+    from entity import Item
+
+Observation = Dict[str, np.ndarray]
+
+MAP_LAYERS = (
+    "walkable",
+    "transparent",
+    "visible",
+    "explored",
+    "stairs",
+    "player",
+    "monster_hp",  # hp fraction of the monster standing there
+    "items",
+)
+
+STATS = (
+    "hp",
+    "max_hp",
+    "power",
+    "defense",
+    "level",
+    "xp",
+    "floor",
+    "inventory",
+)
+
+MOVE_DIRECTIONS = (
+    (0, -1),
+    (0, 1),
+    (-1, 0),
+    (1, 0),
+    (-1, -1),
+    (-1, 1),
+    (1, -1),
+    (1, 1),
+)
+
+WAIT = 0
+PICKUP = 1 + len(MOVE_DIRECTIONS)
+DESCEND = PICKUP + 1
+USE_ITEM = DESCEND + 1
+INVENTORY_SLOTS = 26
+NUM_ACTIONS = USE_ITEM + INVENTORY_SLOTS
+
+KILL_REWARD = 0.1
+DEATH_REWARD = -1.0
+
+
+def observation_shape(engine: Engine) -> Tuple[int, int, int]:
+    return len(MAP_LAYERS), engine.map.width, engine.map.height
+
+
+def observe(engine: Engine, out: Optional[Observation] = None) -> Observation:
+    """Fill out (or new arrays) with the observation of the current state."""
+    if out is None:
+        out = {
+            "map": np.zeros(observation_shape(engine), dtype=np.float32),
+            "stats": np.zeros(len(STATS), dtype=np.float32),
+        }
+
+    gamemap = engine.map
+    player = engine.player
+    layers = out["map"]
+    explored = gamemap.explored
+    visible = gamemap.visible
+
+    np.logical_and(gamemap.tiles["walkable"], explored, out=layers[0])
+    np.logical_and(gamemap.tiles["transparent"], explored, out=layers[1])
+    layers[2] = visible
+    layers[3] = explored
+    layers[4:] = 0
+    if explored[gamemap.downstairs_loc]:
+        layers[4][gamemap.downstairs_loc] = 1
+    layers[5, player.x, player.y] = 1
+
+    # entity layers are scattered in one go from coordinate arrays
+    monsters = [
+        (actor.x, actor.y, actor.fighter.hp / actor.fighter.max_hp)
+        for actor in gamemap.actors
+        if actor is not player and visible[actor.x, actor.y]
+    ]
+    if monsters:
+        xs, ys, hp = zip(*monsters)
+        layers[6][xs, ys] = hp
+
+    items = [(item.x, item.y) for item in gamemap.items if visible[item.x, item.y]]
+    if items:
+        xs, ys = zip(*items)
+        layers[7][xs, ys] = 1
+
+    fighter = player.fighter
+    out["stats"][:] = (
+        fighter.hp,
+        fighter.max_hp,
+        fighter.power,
+        fighter.defense,
+        player.level.current_lvl,
+        player.level.current_xp,
+        engine.world.current_floor,
+        len(player.inventory.items),
+    )
+    return out
+
+
+def closest_enemy(engine: Engine) -> Optional[Tuple[int, int]]:
+    player = engine.player
+    visible = engine.map.visible
+    targets = [
+        (player.distance(actor.x, actor.y), actor.x, actor.y)
+        for actor in engine.map.actors
+        if actor is not player and visible[actor.x, actor.y]
+    ]
+    if not targets:
+        return None
+    _, x, y = min(targets)
+    return x, y
+
+
+def count_monsters(engine: Engine) -> int:
+    # the player leaves map.actors on dying, so it must not be counted
+    return sum(1 for actor in engine.map.actors if actor is not engine.player)
+
+
+def item_action(engine: Engine, item: Item) -> Optional[Action]:
+    # same choices as the inventory menu, minus the targeting screen
+    player = engine.player
+    if item.consumable:
+        if isinstance(
+            item.consumable, (ConfusionConsumable, BombConsumable, PoisonConsumable)
+        ):
+            target = closest_enemy(engine)
+            if target is None:
+                return None
+            return ItemAction(player, item, target)
+        return ItemAction(player, item)
+    if item.equippable:
+        return EquipAction(player, item)
+    return None
+
+
+def decode_action(engine: Engine, action: int) -> Optional[Action]:
+    player = engine.player
+    if action == WAIT:
+        return WaitAction(player)
+    if action < PICKUP:
+        return BumpAction(player, *MOVE_DIRECTIONS[action - 1])
+    if action == PICKUP:
+        return PickupAction(player)
+    if action == DESCEND:
+        return DescendAction(player)
+
+    slot = action - USE_ITEM
+    if not 0 <= slot < INVENTORY_SLOTS:
+        raise ValueError(f"Unknown action {action}")
+    items = player.inventory.items
+    if slot >= len(items):
+        return None
+    return item_action(engine, items[slot])
+
+
+class RoguelikeEnv:
+    """One game, stepped with integer actions.
+
+    Every environment keeps its own random state and swaps it into the global
+    random module while it runs, so a game plays out the same for a given
+    seed no matter how many other environments share the process.
+    """
+
+    def __init__(self, seed: Optional[int] = None, max_turns: int = 2000) -> None:
+        self.seeds = random.Random(seed)
+        self.max_turns = max_turns
+        self.game: Optional[HeadlessEngine] = None
+        self.random_state = random.getstate()
+        # steps taken this game, impossible actions included
+        self.attempts = 0
+
+    @property
+    def engine(self) -> Engine:
+        assert self.game is not None, "reset must be called first"
+        return self.game.engine
+
+    def reset(self, out: Optional[Observation] = None) -> Observation:
+        outer_state = random.getstate()
+        # new_game seeds the random module and builds the first floor with
+        # GameWorld.generate_floor
+        self.game = HeadlessEngine.new_game(self.seeds.randrange(2**32))
+        self.attempts = 0
+        self.random_state = random.getstate()
+        random.setstate(outer_state)
+        return observe(self.engine, out)
+
+    def step(
+        self, action: int, out: Optional[Observation] = None
+    ) -> Tuple[Observation, float, bool, dict]:
+        game = self.game
+        assert game is not None, "reset must be called first"
+        engine = game.engine
+        floor = engine.world.current_floor
+        alive = count_monsters(engine)
+
+        outer_state = random.getstate()
+        random.setstate(self.random_state)
+        try:
+            command = decode_action(engine, action)
+            took_turn = command is not None and game.step(command)
+        finally:
+            self.random_state = random.getstate()
+            random.setstate(outer_state)
+        self.attempts += 1
+
+        reward = 0.0
+        if engine.world.current_floor != floor:
+            reward += engine.world.current_floor - floor
+        else:
+            killed = alive - count_monsters(engine)
+            reward += KILL_REWARD * max(killed, 0)
+
+        # like HeadlessEngine.run, an agent stuck on impossible actions still
+        # gets cut off eventually
+        done = (
+            game.is_over
+            or game.turns >= self.max_turns
+            or self.attempts >= self.max_turns * 10
+        )
+        if game.is_over:
+            reward += DEATH_REWARD
+
+        info = {
+            "took_turn": took_turn,
+            "turns": game.turns,
+            "floor": engine.world.current_floor,
+        }
+        return observe(engine, out), reward, done, info
+
+
+def env_seeds(num_envs: int, seed: Optional[int] = None) -> List[int]:
+    # one seed per environment, so a batch is reproducible from a single seed
+    seeds = random.Random(seed)
+    return [seeds.randrange(2**32) for _ in range(num_envs)]
+
+
+class VectorEnv:
+    """A batch of independent RoguelikeEnvs stepped together.
+
+    Observations are written into preallocated arrays with the batch as the
+    first axis. Finished games are reset automatically, so the observation
+    returned for them is the first one of their next game.
+    """
+
+    def __init__(
+        self, num_envs: int, seed: Optional[int] = None, max_turns: int = 2000
+    ) -> None:
+        self.envs = [
+            RoguelikeEnv(env_seed, max_turns) for env_seed in env_seeds(num_envs, seed)
+        ]
+        self.obs: Optional[Observation] = None
+
+    @property
+    def num_envs(self) -> int:
+        return len(self.envs)
+
+    def views(self, index: int) -> Observation:
+        assert self.obs is not None
+        return {name: array[index] for name, array in self.obs.items()}
+
+    def reset(self) -> Observation:
+        first = self.envs[0].reset()
+        self.obs = {
+            name: np.zeros((self.num_envs,) + array.shape, dtype=array.dtype)
+            for name, array in first.items()
+        }
+        for name, array in first.items():
+            self.obs[name][0] = array
+        for index, env in enumerate(self.envs[1:], start=1):
+            env.reset(self.views(index))
+        return self.obs
+
+    def step(
+        self, actions: Sequence[int]
+    ) -> Tuple[Observation, np.ndarray, np.ndarray, List[dict]]:
+        if self.obs is None:
+            raise RuntimeError("reset must be called before step")
+        if len(actions) != self.num_envs:
+            raise ValueError(f"Expected {self.num_envs} actions, got {len(actions)}")
+
+        rewards = np.zeros(self.num_envs, dtype=np.float32)
+        dones = np.zeros(self.num_envs, dtype=bool)
+        infos = []
+        for index, (env, action) in enumerate(zip(self.envs, actions)):
+            out = self.views(index)
+            _, rewards[index], dones[index], info = env.step(int(action), out)
+            if dones[index]:
+                env.reset(out)
+            infos.append(info)
+
+        return self.obs, rewards, dones, infos
+
+
+def measure_throughput(env: VectorEnv, steps: int, seed: int) -> float:
+    # random actions, so this times the game and observation code only
+    env.reset()
+    actions = np.random.default_rng(seed)
+
+    start = time.perf_counter()
+    batches = max(1, steps // env.num_envs)
+    for _ in range(batches):
+        env.step(actions.integers(0, USE_ITEM, env.num_envs))
+    elapsed = time.perf_counter() - start
+    return batches * env.num_envs / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--envs", type=int, default=16)
+    parser.add_argument("--steps", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rate = measure_throughput(VectorEnv(args.envs, args.seed), args.steps, args.seed)
+    # every environment runs in this process, so this is the rate of one core
+    print(f"{args.envs} envs: {rate:,.0f} steps/s per core")
+
+
+if __name__ == "__main__":
+    main()
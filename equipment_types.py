@@ -4,3 +4,10 @@ from enum import auto, Enum
 class EquipmentType(Enum):
     WEAPON = auto()
     ARMOR = auto()
+
+
+# slot an item of each type goes in unless it names its own
+DEFAULT_SLOTS = {
+    EquipmentType.WEAPON: "weapon",
+    EquipmentType.ARMOR: "shield",
+}
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from typing import Callable, Optional, TYPE_CHECKING
+
+import color
+import exceptions
+import setup_game
+
+if TYPE_CHECKING:
+    from actions import Action
+    from engine import Engine
+
+# picks the next player action from the current game state
+Policy = Callable[["Engine"], "Action"]
+
+
+def level_up_max_hp(engine: Engine) -> None:
+    engine.player.level.increase_max_hp()
+
+
+class HeadlessEngine:
+    """Runs the turn loop of an Engine without a console, window or events.
+
+    Actions are fed in directly and nothing is ever rendered, so games can be
+    simulated as fast as the turn logic allows.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        level_up: Callable[[Engine], None] = level_up_max_hp,
+    ) -> None:
+        self.engine = engine
+        self.level_up = level_up
+        self.turns = 0
+
+    @classmethod
+    def new_game(cls, seed: Optional[int] = None, **kwargs) -> HeadlessEngine:
+        return cls(setup_game.new_game(seed), **kwargs)
+
+    @property
+    def is_over(self) -> bool:
+        return not self.engine.player.is_alive
+
+    def step(self, action: Action) -> bool:
+        # returns whether the action used up a turn, same as handle_action
+        try:
+            self.engine.handle_player_turn(action)
+        except exceptions.Impossible as exc:
+            self.engine.message_log.add_message(exc.args[0], color.impossible)
+            return False
+
+        self.turns += 1
+
+        # no level up menu to show, so the choice is made here
+        while self.engine.player.is_alive and self.engine.player.level.reqs_lvl_up:
+            self.level_up(self.engine)
+
+        return True
+
+    def run(self, policy: Policy, max_turns: int) -> int:
+        # play until the player dies or max_turns turns have passed
+        attempts = 0
+        while not self.is_over and self.turns < max_turns:
+            self.step(policy(self.engine))
+
+            # a policy that only picks impossible actions would never finish
+            attempts += 1
+            if attempts >= max_turns * 10:
+                break
+
+        return self.turns
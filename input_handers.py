@@ -13,6 +13,7 @@ from actions import Action, BumpAction, WaitAction, PickupAction
 import color
 
 import exceptions
+from layers import Layer
 
 if TYPE_CHECKING:
     from engine import Engine
@@ -72,15 +73,15 @@ class EventHandler(BaseEventHandler):
         if action is None:
             return False
 
+        if self.engine.action_recorder:
+            self.engine.action_recorder.record(action)
+
         try:
-            action.perform()
+            self.engine.handle_player_turn(action)
         except exceptions.Impossible as exc:
             self.engine.message_log.add_message(exc.args[0], color.impossible)
             return False
 
-        self.engine.handle_mob_event()
-
-        self.engine.update_fov()
         return True
 
     def ev_mousemotion(self, event: tcod.event.MouseMotion) -> None:
@@ -107,6 +108,10 @@ class AskUserEventHandler(EventHandler):
 class InventoryEventHandler(AskUserEventHandler):
     TITLE = "<Missing>"
 
+    def __init__(self, engine: Engine):
+        super().__init__(engine)
+        self.panel = Layer()
+
     def on_render(self, console: Console) -> None:
         super().on_render(console)
         number_of_items = len(self.engine.player.inventory.items)
@@ -124,31 +129,39 @@ class InventoryEventHandler(AskUserEventHandler):
 
         width = len(self.TITLE) + 4
 
-        console.draw_frame(
-            x=x,
-            y=y,
-            width=width,
-            height=height,
-            title=self.TITLE,
-            clear=True,
-            fg=(255, 255, 255),
-            bg=(0, 0, 0),
-        )
+        item_strings = []
+        for i, item in enumerate(self.engine.player.inventory.items):
+            item_key = chr(ord("a") + i)
 
-        if number_of_items > 0:
-            for i, item in enumerate(self.engine.player.inventory.items):
-                item_key = chr(ord("a") + i)
+            is_equipped = self.engine.player.equipment.item_is_equipped(item)
 
-                is_equipped = self.engine.player.equipment.item_is_equipped(item)
+            item_string = f"({item_key} {item.name})"
 
-                item_string = f"({item_key} {item.name})"
+            if is_equipped:
+                item_string = f"{item_string} (E)"
 
-                if is_equipped:
-                    item_string = f"{item_string} (E)"
+            item_strings.append(item_string)
 
-                console.print(x + 1, y + i + 1, item_string)
-        else:
-            console.print(x + 1, y + 1, "(Empty)")
+        def draw(panel: Console) -> None:
+            panel.draw_frame(
+                x=0,
+                y=0,
+                width=width,
+                height=height,
+                title=self.TITLE,
+                clear=True,
+                fg=(255, 255, 255),
+                bg=(0, 0, 0),
+            )
+
+            if number_of_items > 0:
+                for i, item_string in enumerate(item_strings):
+                    panel.print(1, i + 1, item_string)
+            else:
+                panel.print(1, 1, "(Empty)")
+
+        # only redrawn when the list of items or what's equipped changes
+        self.panel.render(console, x, y, width, height, tuple(item_strings), draw)
 
     def ev_keydown(self, event: tcod.event.KeyDown) -> Optional[ActionOrHandler]:
         player = self.engine.player
@@ -311,6 +324,9 @@ class MainGameEventHandler(EventHandler):
         elif key == tcod.event.KeySym.SLASH:
             return LookHandler(self.engine)
 
+        elif key == tcod.event.KeySym.F3:
+            self.engine.show_perf_overlay = not self.engine.show_perf_overlay
+
         return action
 
 
@@ -339,33 +355,47 @@ CURSOR_KEYS = {
 class HistoryViewer(EventHandler):
     def __init__(self, engine: Engine):
         super().__init__(engine)
-        self.log_length = len(engine.message_log.messages)
+        self.log_length = len(engine.message_log)
         self.cursor = self.log_length - 1
+        self.log_layer = Layer()
 
     def on_render(self, console: Console) -> None:
         super().on_render(console)
 
-        log_console = Console(console.width - 6, console.height - 6)
-
-        log_console.draw_frame(0, 0, log_console.width, log_console.height)
-        log_console.print_box(
-            0,
-            0,
-            log_console.width,
-            1,
-            "| Message History |",
-            alignment=libtcodpy.CENTER,
-        )
-
-        self.engine.message_log.render_messages(
-            log_console,
-            1,
-            1,
-            log_console.width - 2,
-            log_console.height - 2,
-            self.engine.message_log.messages[: self.cursor + 1],
+        def draw(log_console: Console) -> None:
+            log_console.draw_frame(0, 0, log_console.width, log_console.height)
+            log_console.print_box(
+                0,
+                0,
+                log_console.width,
+                1,
+                "| Message History |",
+                alignment=libtcodpy.CENTER,
+            )
+
+            # every message takes at least one line, so a window of `height`
+            # messages ending at the cursor is enough to fill the box
+            height = log_console.height - 2
+            self.engine.message_log.render_messages(
+                log_console,
+                1,
+                1,
+                log_console.width - 2,
+                height,
+                self.engine.message_log.get_messages(
+                    self.cursor + 1 - height, self.cursor + 1
+                ),
+            )
+
+        self.log_layer.render(
+            console,
+            3,
+            3,
+            console.width - 6,
+            console.height - 6,
+            (self.cursor, len(self.engine.message_log)),
+            draw,
         )
-        log_console.blit(console, 3, 3)
 
     def ev_keydown(self, event: tcod.event.KeyDown) -> None:
         if event.sym in CURSOR_KEYS:
@@ -407,6 +437,10 @@ class PopupMessage(BaseEventHandler):
 class LevelUpEventHandler(AskUserEventHandler):
     TITLE = "Level Up"
 
+    def __init__(self, engine: Engine):
+        super().__init__(engine)
+        self.panel = Layer()
+
     def on_render(self, console: Console) -> None:
         super().on_render(console)
 
@@ -415,35 +449,41 @@ class LevelUpEventHandler(AskUserEventHandler):
         else:
             x = 0
 
-        console.draw_frame(
-            x=x,
-            y=0,
-            width=35,
-            height=8,
-            title=self.TITLE,
-            clear=True,
-            fg=(255, 255, 255),
-            bg=(0, 0, 0),
-        )
-
-        console.print(x=x + 1, y=1, string="You levelled up!")
-        console.print(x=x + 1, y=2, string="Select a stat to increase.")
-
-        console.print(
-            x=x + 1,
-            y=4,
-            string=f"a) Max Health (+20 from {self.engine.player.fighter.max_hp})",
-        )
-        console.print(
-            x=x + 1,
-            y=5,
-            string=f"b) Strength (+1 from {self.engine.player.fighter.power})",
-        )
-        console.print(
-            x=x + 1,
-            y=6,
-            string=f"c) Defense (+1 from {self.engine.player.fighter.defense})",
-        )
+        fighter = self.engine.player.fighter
+
+        def draw(panel: Console) -> None:
+            panel.draw_frame(
+                x=0,
+                y=0,
+                width=35,
+                height=8,
+                title=self.TITLE,
+                clear=True,
+                fg=(255, 255, 255),
+                bg=(0, 0, 0),
+            )
+
+            panel.print(x=1, y=1, string="You levelled up!")
+            panel.print(x=1, y=2, string="Select a stat to increase.")
+
+            panel.print(
+                x=1,
+                y=4,
+                string=f"a) Max Health (+20 from {fighter.max_hp})",
+            )
+            panel.print(
+                x=1,
+                y=5,
+                string=f"b) Strength (+1 from {fighter.power})",
+            )
+            panel.print(
+                x=1,
+                y=6,
+                string=f"c) Defense (+1 from {fighter.defense})",
+            )
+
+        key = (fighter.max_hp, fighter.power, fighter.defense)
+        self.panel.render(console, x, 0, 35, 8, key, draw)
 
     def ev_keydown(self, event: tcod.event.KeyDown) -> Optional[ActionOrHandler]:
         player = self.engine.player
@@ -451,6 +491,8 @@ class LevelUpEventHandler(AskUserEventHandler):
         index = key - tcod.event.KeySym.a
 
         if 0 <= index <= 2:
+            if self.engine.action_recorder:
+                self.engine.action_recorder.record_level_up(index)
             if index == 0:
                 player.level.increase_max_hp()
             elif index == 1:
@@ -471,6 +513,10 @@ class LevelUpEventHandler(AskUserEventHandler):
 class CharInfoEventHandler(AskUserEventHandler):
     TITLE = "Character Info"
 
+    def __init__(self, engine: Engine):
+        super().__init__(engine)
+        self.panel = Layer()
+
     def on_render(self, console: Console) -> None:
         super().on_render(console)
 
@@ -483,32 +529,26 @@ class CharInfoEventHandler(AskUserEventHandler):
 
         width = len(self.TITLE) + 4
 
-        console.draw_frame(
-            x=x,
-            y=y,
-            width=width,
-            height=7,
-            title=self.TITLE,
-            clear=True,
-            fg=(255, 255, 255),
-            bg=(0, 0, 0),
-        )
-
-        console.print(
-            x=x + 1, y=y + 1, string=f"Level: {self.engine.player.level.current_lvl}"
-        )
-        console.print(
-            x=x + 1,
-            y=y + 2,
-            string=f"XP: {self.engine.player.level.current_xp} / {self.engine.player.level.xp_to_lvl}",
-        )
-        console.print(
-            x=x + 1,
-            y=y + 4,
-            string=f"Attack: {self.engine.player.fighter.power} (+{self.engine.player.equipment.power_bonus})",
-        )
-        console.print(
-            x=x + 1,
-            y=y + 5,
-            string=f"Defense: {self.engine.player.level.current_lvl} (+{self.engine.player.equipment.defense_bonus})",
-        )
+        lines = {
+            1: f"Level: {self.engine.player.level.current_lvl}",
+            2: f"XP: {self.engine.player.level.current_xp} / {self.engine.player.level.xp_to_lvl}",
+            4: f"Attack: {self.engine.player.fighter.power} (+{self.engine.player.equipment.power_bonus})",
+            5: f"Defense: {self.engine.player.level.current_lvl} (+{self.engine.player.equipment.defense_bonus})",
+        }
+
+        def draw(panel: Console) -> None:
+            panel.draw_frame(
+                x=0,
+                y=0,
+                width=width,
+                height=7,
+                title=self.TITLE,
+                clear=True,
+                fg=(255, 255, 255),
+                bg=(0, 0, 0),
+            )
+
+            for line_y, line in lines.items():
+                panel.print(x=1, y=line_y, string=line)
+
+        self.panel.render(console, x, y, width, 7, tuple(lines.values()), draw)
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from typing import Callable, Hashable, Optional
+
+from tcod.console import Console
+
+
+class Layer:
+    """Off-screen console that is only redrawn when its inputs change.
+
+    `render` blits the cached console every frame, but only calls `draw`
+    when the key given for this frame differs from the one it was last
+    drawn with, or the layer changes size. Static art can use a constant
+    key so it is drawn exactly once.
+    """
+
+    def __init__(self) -> None:
+        self.console: Optional[Console] = None
+        self.key: Hashable = None
+
+    def render(
+        self,
+        dest: Console,
+        x: int,
+        y: int,
+        width: int,
+        height: int,
+        key: Hashable,
+        draw: Callable[[Console], None],
+    ) -> None:
+        if self.console is None or self.console.rgb.shape != (width, height):
+            self.console = Console(width, height, order="F")
+            self.key = None
+            stale = True
+        else:
+            stale = key != self.key
+
+        if stale:
+            self.console.clear()
+            draw(self.console)
+            self.key = key
+
+        self.console.blit(dest, x, y)
@@ -1,10 +1,19 @@
+import argparse
+import os
+import time
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple, Union
+
 import tcod
 import color
 import traceback
 
 import exceptions
 import input_handers
+import metrics
+import profiling
+from recording import Recorder
 import setup_game
+from spectator import SpectatorServer
 
 
 def save_game(handler: input_handers.BaseEventHandler, filename: str) -> None:
@@ -13,50 +22,303 @@ def save_game(handler: input_handers.BaseEventHandler, filename: str) -> None:
         print("Game saved.")
 
 
-def main() -> None:
-    screen_width = 82
-    screen_height = 50
+def handler_phase(handler: input_handers.BaseEventHandler) -> str:
+    # menus and popups are profiled apart from the game itself
+    if isinstance(handler, input_handers.EventHandler):
+        return "gameplay"
+    return "menu"
+
+
+# anything that wants a copy of every frame drawn
+FrameSink = Union[Recorder, SpectatorServer]
+
+SCREEN_WIDTH = 82
+SCREEN_HEIGHT = 50
+
+# events that only redraw if they changed what the handler shows
+PASSIVE_EVENTS = (
+    tcod.event.MouseMotion,
+    tcod.event.MouseButtonUp,
+    tcod.event.KeyUp,
+    tcod.event.TextInput,
+)
+
+# most frames per second to draw while the window doesn't have focus
+UNFOCUSED_FPS = 10
+
+
+def coalesce_events(events: Iterable[tcod.event.Event]) -> List[tcod.event.Event]:
+    # a run of mouse motion only matters for where it ends up
+    coalesced: List[tcod.event.Event] = []
+    for event in events:
+        if (
+            isinstance(event, tcod.event.MouseMotion)
+            and coalesced
+            and isinstance(coalesced[-1], tcod.event.MouseMotion)
+        ):
+            coalesced[-1] = event
+        else:
+            coalesced.append(event)
+    return coalesced
+
+
+def view_state(handler: input_handers.BaseEventHandler) -> Tuple[object, ...]:
+    # what a passive event could have changed on screen
+    if isinstance(handler, input_handers.EventHandler):
+        return handler, handler.engine.mouse_loc
+    return (handler,)
 
-    tileset = tcod.tileset.load_tilesheet(
-        "dejavu10x10_gs_tc.png", 32, 8, tcod.tileset.CHARMAP_TCOD
-    )
 
-    handler: input_handers.BaseEventHandler = setup_game.MainMenu()
+def run_loop(
+    handler: input_handers.BaseEventHandler,
+    root_console: tcod.console.Console,
+    present: Callable[[tcod.console.Console], object],
+    wait: Callable[[Optional[float]], Iterable[tcod.event.Event]],
+    profiler: Optional[profiling.SessionProfiler] = None,
+    frame_sinks: Sequence[FrameSink] = (),
+    convert_event: Optional[Callable[[tcod.event.Event], object]] = None,
+    print_errors: bool = True,
+) -> None:
+    # the game loop shared by the window and the terminal: draws a frame
+    # when something changed, hands events to the current handler and saves
+    # the game on the way out
+    needs_redraw = True
+    focused = True
+    last_present = 0.0
+
+    try:
+        while True:
+            # only draw when something changed, and less often unfocused
+            wait_timeout: Optional[float] = None
+            if needs_redraw:
+                if not focused:
+                    wait_timeout = last_present + 1 / UNFOCUSED_FPS
+                    wait_timeout -= time.perf_counter()
+
+                if wait_timeout is None or wait_timeout <= 0:
+                    wait_timeout = None
+                    with profiling.scope(profiler, handler_phase(handler)):
+                        with metrics.registry.timer("frame.render"):
+                            root_console.clear()
+                            handler.on_render(console=root_console)
+                    with metrics.registry.timer("frame.present"):
+                        present(root_console)
+                    for sink in frame_sinks:
+                        sink.capture(root_console)
+                    last_present = time.perf_counter()
+                    needs_redraw = False
+
+            try:
+                for event in coalesce_events(wait(wait_timeout)):
+                    if isinstance(event, tcod.event.WindowEvent):
+                        if event.type == "WindowFocusLost":
+                            focused = False
+                        elif event.type == "WindowFocusGained":
+                            focused = True
+
+                    before = view_state(handler)
+                    with profiling.scope(profiler, handler_phase(handler)):
+                        if convert_event is not None:
+                            convert_event(event)
+                        handler = handler.handle_events(event)
+
+                    if not isinstance(event, PASSIVE_EVENTS):
+                        needs_redraw = True
+                    elif view_state(handler) != before:
+                        needs_redraw = True
+            except Exception:
+                if print_errors:
+                    traceback.print_exc()
+                needs_redraw = True
+                if isinstance(handler, input_handers.EventHandler):
+                    handler.engine.message_log.add_message(
+                        traceback.format_exc(), color.error
+                    )
+    except exceptions.QuitWithoutSaving:
+        raise
+    except BaseException:
+        save_game(handler, "savegame.sav")
+        raise
+
+
+def main(
+    profiler: Optional[profiling.SessionProfiler] = None,
+    frame_sinks: Sequence[FrameSink] = (),
+    menu: Optional[setup_game.MainMenu] = None,
+) -> None:
+    if os.environ.get("METRICS_FILE"):
+        metrics.dump_at_exit(os.environ["METRICS_FILE"])
+
+    with profiling.scope(profiler, "startup"):
+        tileset = tcod.tileset.load_tilesheet(
+            "dejavu10x10_gs_tc.png", 32, 8, tcod.tileset.CHARMAP_TCOD
+        )
+
+        handler: input_handers.BaseEventHandler = menu or setup_game.MainMenu()
 
     with tcod.context.new_terminal(
-        screen_width,
-        screen_height,
+        SCREEN_WIDTH,
+        SCREEN_HEIGHT,
         tileset=tileset,
         title="Roguelike Game",
         vsync=True,
     ) as context:
-        root_console = tcod.console.Console(screen_width, screen_height, order="F")
+        root_console = tcod.console.Console(SCREEN_WIDTH, SCREEN_HEIGHT, order="F")
+        run_loop(
+            handler,
+            root_console,
+            context.present,
+            tcod.event.wait,
+            profiler,
+            frame_sinks,
+            convert_event=context.convert_event,
+        )
+
+
+def main_terminal(
+    profiler: Optional[profiling.SessionProfiler] = None,
+    frame_sinks: Sequence[FrameSink] = (),
+    menu: Optional[setup_game.MainMenu] = None,
+) -> None:
+    from terminal import AnsiRenderer, TerminalInput
 
+    with profiling.scope(profiler, "startup"):
+        handler: input_handers.BaseEventHandler = menu or setup_game.MainMenu()
+        root_console = tcod.console.Console(SCREEN_WIDTH, SCREEN_HEIGHT, order="F")
+        renderer = AnsiRenderer()
+
+    with TerminalInput() as keys:
+        renderer.open()
         try:
-            while True:
-                root_console.clear()
-                handler.on_render(console=root_console)
-                context.present(root_console)
-
-                try:
-                    for event in tcod.event.wait():
-                        context.convert_event(event)
-                        handler = handler.handle_events(event)
-                except Exception:
-                    traceback.print_exc()
-                    if isinstance(handler, input_handers.EventHandler):
-                        handler.engine.message_log.add_message(
-                            traceback.format_exc(), color.error
-                        )
-        except exceptions.QuitWithoutSaving:
-            raise
-        except SystemExit:
-            save_game(handler, "savegame.sav")
-            raise
-        except BaseException:
-            save_game(handler, "savegame.sav")
-            raise
+            # printing errors would scribble over the screen, so they only
+            # go to the message log
+            run_loop(
+                handler,
+                root_console,
+                renderer.present,
+                keys.wait,
+                profiler,
+                frame_sinks,
+                print_errors=False,
+            )
+        finally:
+            renderer.close()
+
+
+def main_headless(
+    seed: int,
+    turns: int,
+    profiler: Optional[profiling.SessionProfiler] = None,
+    ai_budget: Optional[float] = None,
+) -> None:
+    from headless import HeadlessEngine
+    import policies
+
+    with profiling.scope(profiler, "startup"):
+        game = HeadlessEngine.new_game(seed=seed)
+        game.engine.ai_budget = ai_budget
+
+    with profiling.scope(profiler, "gameplay"):
+        game.run(policies.greedy_policy, turns)
+
+    print(
+        f"Played {game.turns} turns, reached floor {game.engine.world.current_floor}."
+    )
+
+
+def main_replay(
+    path: str, profiler: Optional[profiling.SessionProfiler] = None
+) -> None:
+    import replay
+
+    with profiling.scope(profiler, "startup"):
+        log = replay.ActionLog(path)
+
+    with profiling.scope(profiler, "gameplay"):
+        engine = replay.replay_headless(log)
+
+    print(f"Replayed {len(log)} actions, reached floor {engine.world.current_floor}.")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Rat dungeon adventure.")
+    parser.add_argument(
+        "--profile",
+        metavar="PREFIX",
+        help="profile the session, writing PREFIX.<phase>.pstats and PREFIX.collapsed",
+    )
+    parser.add_argument(
+        "--headless",
+        metavar="SEED",
+        type=int,
+        help="play a scripted game with this seed without opening a window",
+    )
+    parser.add_argument(
+        "--turns", type=int, default=1000, help="turn limit for --headless"
+    )
+    parser.add_argument(
+        "--terminal",
+        action="store_true",
+        help="play in this terminal with ANSI colours instead of opening a window",
+    )
+    parser.add_argument(
+        "--record",
+        metavar="FILE",
+        help="record the screen to FILE, play it back with recording.py",
+    )
+    parser.add_argument(
+        "--record-actions",
+        metavar="FILE",
+        help="log every action of a new game to FILE, replay it with replay.py",
+    )
+    parser.add_argument(
+        "--replay",
+        metavar="FILE",
+        help="replay an action log headless, e.g. to profile it",
+    )
+    parser.add_argument(
+        "--spectate",
+        metavar="PORT",
+        type=int,
+        help="let viewers watch live with spectator.py on this local port",
+    )
+    parser.add_argument(
+        "--ai-budget",
+        metavar="MS",
+        type=float,
+        help="cap the time spent re-planning mob paths each turn",
+    )
+    args = parser.parse_args()
+    if args.ai_budget is not None and args.record_actions:
+        # planning then depends on timing, so the log wouldn't replay
+        parser.error("--ai-budget can't be used with --record-actions")
+    return args
 
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    profiler = profiling.SessionProfiler(args.profile) if args.profile else None
+    ai_budget = None if args.ai_budget is None else args.ai_budget / 1000
+    frame_sinks: List[FrameSink] = []
+    if args.record:
+        frame_sinks.append(Recorder(args.record))
+    if args.spectate:
+        frame_sinks.append(SpectatorServer(args.spectate))
+    # owns the action log of any game started from it
+    menu = setup_game.MainMenu(args.record_actions, ai_budget, profiler)
+    try:
+        if args.headless is not None:
+            main_headless(args.headless, args.turns, profiler, ai_budget)
+        elif args.replay:
+            main_replay(args.replay, profiler)
+        elif args.terminal:
+            main_terminal(profiler, frame_sinks, menu)
+        else:
+            main(profiler, frame_sinks, menu)
+    finally:
+        menu.close()
+        for sink in frame_sinks:
+            sink.close()
+        if profiler:
+            for path in profiler.write():
+                print(f"Wrote {path}")
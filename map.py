@@ -2,16 +2,80 @@ from __future__ import annotations
 
 import numpy as np
 
-from typing import Iterable, Iterator, Optional, TYPE_CHECKING
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    MutableSet,
+    Optional,
+    Sequence,
+    Tuple,
+    TYPE_CHECKING,
+)
 
 from tcod.console import Console
 
 from entity import Actor, Item
+from metrics import registry as metrics
 import tile_types
+import zobrist
 
 if TYPE_CHECKING:
     from engine import Engine
     from entity import Entity
+    from procgen import RectangularRoom
+
+
+class EntitySet(MutableSet["Entity"]):
+    """Set of entities that iterates in the order they were added.
+
+    Plain sets iterate in an order that depends on memory addresses, which
+    would make mob turn order, and so replays, differ between runs.
+
+    It also keeps the sum of the state hash terms of its entities, see
+    zobrist.py, which entities refresh through `rehash` when they change.
+    """
+
+    def __init__(self, entities: Iterable[Entity] = ()) -> None:
+        self._entities: Dict[Entity, int] = {}
+        self.hash_sum = 0
+        for entity in entities:
+            self.add(entity)
+
+    def __contains__(self, entity: object) -> bool:
+        return entity in self._entities
+
+    def __iter__(self) -> Iterator[Entity]:
+        return iter(self._entities)
+
+    def __len__(self) -> int:
+        return len(self._entities)
+
+    def add(self, entity: Entity) -> None:
+        self.rehash(entity)
+
+    def discard(self, entity: Entity) -> None:
+        term = self._entities.pop(entity, None)
+        if term is not None:
+            self.hash_sum = (self.hash_sum - term) & zobrist.MASK
+
+    def rehash(self, entity: Entity) -> None:
+        # adds the entity if it isn't in the set yet
+        term = zobrist.entity_term(entity)
+        old_term = self._entities.get(entity, 0)
+        self._entities[entity] = term
+        self.hash_sum = (self.hash_sum - old_term + term) & zobrist.MASK
+
+
+# share of scent that moves to the neighbouring cells each turn
+SCENT_DIFFUSION = 0.5
+# share of scent left after each turn
+SCENT_DECAY = 0.95
+SCENT_MIN = 1e-3
+PLAYER_SCENT = 1.0
+# a fight can be heard from further away than the player can be smelt
+NOISE_MELEE = 4.0
 
 
 class GameMap:
@@ -20,8 +84,10 @@ class GameMap:
     ):
         self.engine = engine
         self.width, self.height = width, height
-        self.entities = set(entities)
+        self.entities = EntitySet(entities)
         self.tiles = np.full((width, height), fill_value=tile_types.wall, order="F")
+        # edit tiles with set_tiles, or call rehash_tiles after bulk edits
+        self.tile_hash = zobrist.tiles_sum(self.tiles)
 
         self.visible = np.full(
             (width, height),
@@ -39,6 +105,15 @@ class GameMap:
 
         self.downstairs_loc = (0, 0)
 
+        # (from x, from y, to x, to y) -> whether nothing blocks the view
+        self.sight_cache: Dict[Tuple[int, int, int, int], bool] = {}
+
+        # the rooms procgen carved out, in the order they were made
+        self.rooms: List[RectangularRoom] = []
+
+        # player scent and noise, spread over the walkable tiles every turn
+        self.scent = np.zeros((width, height), dtype=np.float32, order="F")
+
     @property
     def gamemap(self) -> GameMap:
         return self
@@ -73,9 +148,142 @@ class GameMap:
 
         return None
 
+    def path_cost(self) -> np.ndarray:
+        # walkable tiles cost 1, and 11 where something blocks the way, so
+        # paths go around other actors when there is room to
+        cost = np.array(self.tiles["walkable"], dtype=np.int8)
+        for entity in self.entities:
+            if entity.blocks_movement and cost[entity.x, entity.y]:
+                cost[entity.x, entity.y] += 10
+        return cost
+
     def in_bounds(self, x: int, y: int) -> bool:
         return 0 <= x < self.width and 0 <= y < self.height
 
+    def set_tiles(self, index: zobrist.TileIndex, tile: np.ndarray) -> None:
+        # a single (x, y) tile, a block given as a pair of slices, or a pair
+        # of coordinate arrays naming each cell no more than once
+        x, y = index
+        if isinstance(x, slice) and isinstance(y, slice):
+            x0 = x.indices(self.width)[0]
+            y0 = y.indices(self.height)[0]
+            old_sum = zobrist.tiles_sum(self.tiles[x, y], x0, y0)
+            self.tiles[x, y] = tile
+            new_sum = zobrist.tiles_sum(self.tiles[x, y], x0, y0)
+        elif isinstance(x, np.ndarray) and isinstance(y, np.ndarray):
+            old_sum = zobrist.cells_sum(x, y, self.tiles[x, y])
+            self.tiles[x, y] = tile
+            new_sum = zobrist.cells_sum(x, y, self.tiles[x, y])
+        else:
+            old_sum = zobrist.tile_term(x, y, self.tiles[x, y])
+            self.tiles[x, y] = tile
+            new_sum = zobrist.tile_term(x, y, self.tiles[x, y])
+
+        self.tile_hash = (self.tile_hash - old_sum + new_sum) & zobrist.MASK
+        self.sight_cache.clear()
+
+    def rehash_tiles(self) -> None:
+        self.tile_hash = zobrist.tiles_sum(self.tiles)
+        self.sight_cache.clear()
+
+    def update_scent(self, x: int, y: int) -> None:
+        # part of every cell's scent flows out evenly to its walkable
+        # neighbours, then everything fades, then the player leaves fresh
+        # scent at (x, y)
+        walkable = self.tiles["walkable"]
+        open_cells = np.pad(walkable, 1).astype(np.float32)
+        neighbours = (
+            open_cells[:-2, 1:-1]
+            + open_cells[2:, 1:-1]
+            + open_cells[1:-1, :-2]
+            + open_cells[1:-1, 2:]
+        )
+
+        # what each cell gives to every one of its neighbours, so a cell
+        # with nowhere to spread to keeps its scent
+        share = np.pad(SCENT_DIFFUSION * self.scent / np.maximum(neighbours, 1), 1)
+        inflow = share[:-2, 1:-1] + share[2:, 1:-1] + share[1:-1, :-2] + share[1:-1, 2:]
+
+        self.scent -= SCENT_DIFFUSION * self.scent * (neighbours > 0)
+        self.scent += inflow
+        self.scent *= SCENT_DECAY * walkable
+        self.scent[self.scent < SCENT_MIN] = 0
+        self.scent[x, y] = max(self.scent[x, y], PLAYER_SCENT)
+
+    def make_noise(self, x: int, y: int, loudness: float) -> None:
+        # noise is stronger than scent but spreads and fades the same way
+        self.scent[x, y] = max(self.scent[x, y], loudness)
+
+    def scent_step(self, x: int, y: int) -> Optional[Tuple[int, int]]:
+        # direction to the strongest scent around (x, y), if it beats (x, y)
+        x0, y0 = max(x - 1, 0), max(y - 1, 0)
+        around = self.scent[x0 : x + 2, y0 : y + 2]
+        best_x, best_y = np.unravel_index(int(around.argmax()), around.shape)
+        if around[best_x, best_y] <= self.scent[x, y]:
+            return None
+        return x0 + int(best_x) - x, y0 + int(best_y) - y
+
+    def lines_of_sight(
+        self, origins: Sequence[Tuple[int, int]], target: Tuple[int, int]
+    ) -> np.ndarray:
+        """Whether each origin has a clear line to target, as a bool array.
+
+        Lines not in the cache yet are traced together with numpy. Only the
+        cells between the two ends have to be transparent.
+        """
+        x1, y1 = target
+        result = np.zeros(len(origins), dtype=bool)
+        missing = []
+        for index, (x0, y0) in enumerate(origins):
+            cached = self.sight_cache.get((x0, y0, x1, y1))
+            if cached is None:
+                missing.append(index)
+            else:
+                result[index] = cached
+        if not missing:
+            return result
+
+        metrics.count("sight.traced", len(missing))
+        start = np.array([origins[index] for index in missing]).reshape(-1, 2)
+        delta = np.array(target) - start
+        steps = np.abs(delta).max(axis=1)
+
+        # walk every line one step along its longer axis at a time. After t
+        # steps Bresenham has moved ceil(t * minor / major - 1/2) along the
+        # shorter axis, rounding ties back towards the start like tcod does
+        t = np.arange(1, max(int(steps.max()), 1))
+        inside = t < steps[:, None]
+        major = np.maximum(steps, 1)[:, None]
+
+        def offsets(axis_delta: np.ndarray) -> np.ndarray:
+            minor = np.abs(axis_delta)[:, None]
+            moved = -((major - 2 * minor * t) // (2 * major))
+            return np.sign(axis_delta)[:, None] * moved
+
+        xs = start[:, :1] + offsets(delta[:, 0])
+        ys = start[:, 1:] + offsets(delta[:, 1])
+        xs = np.where(inside, xs, x1)
+        ys = np.where(inside, ys, y1)
+        clear = (self.tiles["transparent"][xs, ys] | ~inside).all(axis=1)
+
+        if len(self.sight_cache) > 1 << 16:
+            self.sight_cache.clear()
+        for index, (x0, y0), seen in zip(missing, start.tolist(), clear.tolist()):
+            self.sight_cache[x0, y0, x1, y1] = seen
+            result[index] = seen
+        return result
+
+    @property
+    def state_hash(self) -> int:
+        # tiles, and position, hp and ai state of everything on the map
+        return zobrist.mix(self.tile_hash ^ zobrist.mix(self.entities.hash_sum))
+
+    def recompute_state_hash(self) -> int:
+        # from scratch, to check the incremental hash against
+        entities_sum = sum(zobrist.entity_term(entity) for entity in self.entities)
+        tile_hash = zobrist.tiles_sum(self.tiles)
+        return zobrist.mix(tile_hash ^ zobrist.mix(entities_sum & zobrist.MASK))
+
     def render(self, console: Console) -> None:
         console.rgb[0 : self.width, 0 : self.height] = self.tiles["dark"]
 
@@ -89,11 +297,15 @@ class GameMap:
             self.entities, key=lambda x: x.render_order.value
         )
 
+        rendered = 0
         for entity in entities_sorted_for_render:
             if self.visible[entity.x, entity.y]:
                 console.print(
                     x=entity.x, y=entity.y, string=str(entity.char), fg=entity.color
                 )
+                rendered += 1
+
+        metrics.count("render.entities", rendered)
 
 
 class GameWorld:
@@ -122,6 +334,14 @@ class GameWorld:
 
         self.current_floor += 1
 
+        # monsters on the floor being left never act again, so their effects
+        # go now rather than lingering without timers
+        old_map = getattr(self.engine, "map", None)
+        if old_map is not None:
+            for actor in list(old_map.actors):
+                if actor is not self.engine.player:
+                    actor.statuses.clear()
+
         self.engine.map = generate_dungeon(
             max_rooms=self.max_rooms,
             room_min_size=self.room_min_size,
@@ -0,0 +1,8 @@
+# size and room layout of every dungeon floor, kept apart from setup_game so
+# offline tools can build floors without loading the menu's assets
+MAP_WIDTH = 80
+MAP_HEIGHT = 43
+
+ROOM_MAX_SIZE = 10
+ROOM_MIN_SIZE = 6
+MAX_ROOMS = 30
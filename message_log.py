@@ -1,9 +1,13 @@
-from typing import Iterable, List, Reversible, Tuple
+from typing import IO, Iterable, List, Reversible, Tuple
+import json
+import struct
+import tempfile
 import textwrap
 
 from tcod.console import Console
 
 import color
+from metrics import registry as metrics
 
 
 class Message:
@@ -20,18 +24,106 @@ class Message:
         return self.plain_text
 
 
-class MessageLog:
+class MessageArchive:
+    """Append-only on-disk store for messages that have left the in-memory log.
+
+    Each message is one line in the data file, and the index file holds the
+    byte offset of every line as a fixed width record, so any window of
+    messages can be read without touching the rest of the history.
+    """
+
+    offset_format = struct.Struct("<Q")
+
     def __init__(self) -> None:
+        self.length = 0
+        self.data: IO[bytes] = tempfile.TemporaryFile()
+        self.index: IO[bytes] = tempfile.TemporaryFile()
+
+    def append(self, messages: Iterable[Message]) -> None:
+        self.data.seek(0, 2)
+        self.index.seek(0, 2)
+        for message in messages:
+            self.index.write(self.offset_format.pack(self.data.tell()))
+            self.data.write(self.encode(message))
+            self.length += 1
+
+    def read(self, start: int, end: int) -> List[Message]:
+        # messages in [start, end), only reading those lines from disk
+        start = max(0, start)
+        end = min(end, self.length)
+        if start >= end:
+            return []
+
+        self.index.seek(start * self.offset_format.size)
+        (offset,) = self.offset_format.unpack(self.index.read(self.offset_format.size))
+        self.data.seek(offset)
+        return [self.decode(self.data.readline()) for _ in range(end - start)]
+
+    @staticmethod
+    def encode(message: Message) -> bytes:
+        record = [message.plain_text, list(message.fg), message.count]
+        return json.dumps(record).encode("utf-8") + b"\n"
+
+    @staticmethod
+    def decode(line: bytes) -> Message:
+        text, fg, count = json.loads(line)
+        message = Message(text, tuple(fg))
+        message.count = count
+        return message
+
+    def __getstate__(self) -> dict:
+        # file handles can't be pickled, so saves carry the archive contents
+        self.data.seek(0)
+        self.index.seek(0)
+        return {
+            "length": self.length,
+            "data": self.data.read(),
+            "index": self.index.read(),
+        }
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__()
+        self.length = state["length"]
+        self.data.write(state["data"])
+        self.index.write(state["index"])
+
+
+class MessageLog:
+    def __init__(self, max_in_memory: int = 512) -> None:
         self.messages: List[Message] = []
+        self.archive = MessageArchive()
+        self.max_in_memory = max_in_memory
+
+    def __len__(self) -> int:
+        return self.archive.length + len(self.messages)
 
     def add_message(
         self, text: str, fg: Tuple[int, int, int] = color.white, *, stack: bool = True
     ) -> None:
         # add a message to the log
+        metrics.count("messages.added")
         if stack and self.messages and text == self.messages[-1].plain_text:
             self.messages[-1].count += 1
         else:
             self.messages.append(Message(text, fg))
+            if len(self.messages) >= 2 * self.max_in_memory:
+                self.spill()
+
+    def spill(self) -> None:
+        # move all but the newest messages to the archive
+        spilled = self.messages[: -self.max_in_memory]
+        self.archive.append(spilled)
+        del self.messages[: len(spilled)]
+
+    def get_messages(self, start: int, end: int) -> List[Message]:
+        # messages in [start, end) across the archive and the in-memory tail
+        archived = self.archive.length
+        start = max(0, start)
+        end = min(end, len(self))
+
+        window = self.archive.read(start, min(end, archived))
+        window.extend(self.messages[max(0, start - archived) : max(0, end - archived)])
+        return window
 
     def render(self, console: Console, x: int, y: int, width: int, height: int) -> None:
         # render message log
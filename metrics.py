@@ -0,0 +1,170 @@
+"""Counters and timing histograms for the turn loop.
+
+Everything records into the module level `registry`, which can be written
+out as JSON with `registry.dump(path)` or automatically at exit with
+`dump_at_exit(path)`. Set the METRICS_FILE environment variable to have
+main.py do the latter.
+"""
+
+from __future__ import annotations
+
+import atexit
+import bisect
+from collections import deque
+import json
+import os
+import threading
+import time
+from typing import Deque, Dict, List, Optional
+
+# bucket upper bounds in seconds, doubling from ~1us to ~16s
+TIME_BUCKETS = [2.0**exponent for exponent in range(-20, 5)]
+
+# how many of the latest observations the rolling averages cover
+ROLLING_WINDOW = 32
+
+
+class Histogram:
+    def __init__(self, bounds: List[float] = TIME_BUCKETS) -> None:
+        self.bounds = bounds
+        # the last bucket catches everything above the highest bound
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self.last = 0.0
+        self.recent: Deque[float] = deque(maxlen=ROLLING_WINDOW)
+
+    def observe(self, value: float) -> None:
+        self.buckets[bisect.bisect_left(self.bounds, value)] += 1
+        self.recent.append(value)
+        self.count += 1
+        self.total += value
+        self.last = value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    @property
+    def rolling_mean(self) -> float:
+        return sum(self.recent) / len(self.recent) if self.recent else 0.0
+
+    def quantile(self, q: float) -> float:
+        # upper bound of the bucket holding the q-th observation
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "mean": self.mean,
+            "min": self.min if self.count else 0.0,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            "buckets": {
+                str(bound): count
+                for bound, count in zip(self.bounds + [float("inf")], self.buckets)
+                if count
+            },
+        }
+
+
+class Timer:
+    """Context manager that records its elapsed time into a histogram."""
+
+    def __init__(self, histogram: Histogram) -> None:
+        self.histogram = histogram
+        self.start = 0.0
+
+    def __enter__(self) -> Timer:
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.histogram.observe(time.perf_counter() - self.start)
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self.counters: Dict[str, int] = {}
+        self.histograms: Dict[str, Histogram] = {}
+        # counters are also bumped from the AI planning threads
+        self.lock = threading.Lock()
+
+    def count(self, name: str, amount: int = 1) -> None:
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def histogram(self, name: str) -> Histogram:
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        return histogram
+
+    def observe(self, name: str, value: float) -> None:
+        self.histogram(name).observe(value)
+
+    def timer(self, name: str) -> Timer:
+        return Timer(self.histogram(name))
+
+    def reset(self) -> None:
+        self.counters.clear()
+        self.histograms.clear()
+
+    def to_dict(self) -> dict:
+        return {
+            "counters": dict(sorted(self.counters.items())),
+            "histograms": {
+                name: histogram.to_dict()
+                for name, histogram in sorted(self.histograms.items())
+            },
+        }
+
+    def dump(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+registry = MetricsRegistry()
+
+
+def memory_in_use() -> Optional[int]:
+    # resident set size in bytes, None where the platform can't tell us
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    # peak rather than current usage, and in kilobytes except on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+_exit_path: Optional[str] = None
+
+
+def dump_at_exit(path: str) -> None:
+    global _exit_path
+    if _exit_path is None:
+        atexit.register(lambda: registry.dump(_exit_path))
+    _exit_path = path
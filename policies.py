@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from typing import Optional, TYPE_CHECKING
+
+from actions import (
+    Action,
+    BumpAction,
+    DescendAction,
+    EquipAction,
+    ItemAction,
+    MeleeAction,
+    PickupAction,
+    WaitAction,
+)
+from components.consumable import HealingConsumable
+
+if TYPE_CHECKING:
+    from engine import Engine
+    from entity import Item
+
+
+def better_equipment(engine: Engine) -> Optional[Item]:
+    # first carried item that beats what is in its slot
+    equipment = engine.player.equipment
+
+    for item in engine.player.inventory.items:
+        if not item.equippable or equipment.item_is_equipped(item):
+            continue
+
+        current = equipment.slots.get(item.equippable.slot)
+
+        new_bonus = item.equippable.power_bonus + item.equippable.defense_bonus
+        if current is None or current.equippable is None:
+            return item
+        if (
+            new_bonus
+            > current.equippable.power_bonus + current.equippable.defense_bonus
+        ):
+            return item
+
+    return None
+
+
+def greedy_policy(engine: Engine) -> Action:
+    """Scripted player: heal when low, fight what it sees, loot, then dive."""
+    player = engine.player
+    gamemap = engine.map
+
+    if player.fighter.hp <= player.fighter.max_hp // 3:
+        for item in player.inventory.items:
+            if isinstance(item.consumable, HealingConsumable):
+                return ItemAction(player, item)
+
+    enemies = [
+        actor
+        for actor in gamemap.actors
+        if actor is not player and gamemap.visible[actor.x, actor.y]
+    ]
+
+    for enemy in enemies:
+        dx = enemy.x - player.x
+        dy = enemy.y - player.y
+        if max(abs(dx), abs(dy)) <= 1:
+            return MeleeAction(player, dx, dy)
+
+    item = better_equipment(engine)
+    if item:
+        return EquipAction(player, item)
+
+    if len(player.inventory.items) < player.inventory.capacity:
+        for item in gamemap.items:
+            if item.x == player.x and item.y == player.y:
+                return PickupAction(player)
+
+    if (player.x, player.y) == gamemap.downstairs_loc:
+        return DescendAction(player)
+
+    if enemies:
+        target = min(enemies, key=lambda enemy: player.distance(enemy.x, enemy.y))
+        dest = target.x, target.y
+    else:
+        dest = gamemap.downstairs_loc
+
+    # the player is built with a HostileEnemy ai, which can do the pathfinding
+    path = player.ai.get_path_to(*dest) if player.ai else []
+    if path:
+        dest_x, dest_y = path[0]
+        return BumpAction(player, dest_x - player.x, dest_y - player.y)
+
+    return WaitAction(player)
@@ -1,7 +1,10 @@
 from __future__ import annotations
 from typing import Dict, Tuple, Iterator, List, TYPE_CHECKING
+from components.ai import HostileEnemy, Pack
+from entity import Actor
 from map import GameMap
 import entity_factory
+import numpy as np
 import random
 import tile_types
 import tcod
@@ -16,9 +19,18 @@ max_mobs_floor = [(1, 2), (4, 3), (6, 5)]
 
 item_chances: Dict[int, List[Tuple[Entity, int]]] = {
     0: [(entity_factory.health_potion, 35), (entity_factory.stick, 10)],
-    1: [(entity_factory.confusion_scroll, 10), (entity_factory.shield, 15)],
-    2: [(entity_factory.lightning_scroll, 25), (entity_factory.knife, 5)],
+    1: [
+        (entity_factory.confusion_scroll, 10),
+        (entity_factory.shield, 15),
+        (entity_factory.regeneration_potion, 10),
+    ],
+    2: [
+        (entity_factory.lightning_scroll, 25),
+        (entity_factory.knife, 5),
+        (entity_factory.poison_vial, 15),
+    ],
     3: [(entity_factory.bomb, 25), (entity_factory.big_shield, 15)],
+    4: [(entity_factory.haste_potion, 10)],
 }
 
 enemy_chances: Dict[int, List[Tuple[Entity, int]]] = {
@@ -123,12 +135,24 @@ def place_entities(room: RectangularRoom, dungeon: GameMap, floor: int) -> None:
     monsters: List[Entity] = get_random_entity(enemy_chances, number_of_mobs, floor)
     items: List[Entity] = get_random_entity(item_chances, number_of_items, floor)
 
+    spawned: List[Entity] = []
     for entity in monsters + items:
         x = random.randint(room.x1 + 1, room.x2 - 1)
         y = random.randint(room.y1 + 1, room.y2 - 1)
 
         if not any(entity.x == x and entity.y == y for entity in dungeon.entities):
-            entity.spawn(dungeon, x, y)
+            spawned.append(entity.spawn(dungeon, x, y))
+
+    # monsters that share a room hunt together
+    hunters = [
+        entity.ai
+        for entity in spawned
+        if isinstance(entity, Actor) and isinstance(entity.ai, HostileEnemy)
+    ]
+    if len(hunters) > 1:
+        pack = Pack()
+        for ai in hunters:
+            pack.join(ai)
 
 
 def generate_dungeon(
@@ -158,21 +182,25 @@ def generate_dungeon(
         if any(new_room.intersects(other) for other in rooms):
             continue
 
-        dungeon.tiles[new_room.inner] = tile_types.floor
+        dungeon.set_tiles(new_room.inner, tile_types.floor)
 
         if len(rooms) == 0:
             player.place(*new_room.center, dungeon)
         else:
-            for x, y in tunnel_between(rooms[-1].center, new_room.center):
-                dungeon.tiles[x, y] = tile_types.floor
+            # the corner is on both legs, and set_tiles wants each cell once
+            tunnel = dict.fromkeys(tunnel_between(rooms[-1].center, new_room.center))
+            xs, ys = np.array(list(tunnel)).T
+            dungeon.set_tiles((xs, ys), tile_types.floor)
 
             center_of_last_room = new_room.center
 
         place_entities(new_room, dungeon, engine.world.current_floor)
 
-        dungeon.tiles[center_of_last_room] = tile_types.down_stairs
+        dungeon.set_tiles(center_of_last_room, tile_types.down_stairs)
         dungeon.downstairs_loc = center_of_last_room
 
         rooms.append(new_room)
 
+    dungeon.rooms = rooms
+
     return dungeon
@@ -0,0 +1,107 @@
+"""Profiling for whole play sessions, scoped to the code we actually run.
+
+Time is only recorded inside `SessionProfiler.scope`, which main.py wraps
+around rendering and event handling but not around waiting on SDL. Each
+scope is tagged with a phase (startup, menu, gameplay) and every phase
+gets its own pstats file. A sampling thread also records whole call
+stacks into a collapsed stack file that flame graph tools can read:
+
+    <prefix>.<phase>.pstats
+    <prefix>.collapsed
+"""
+
+from __future__ import annotations
+
+import cProfile
+from collections import Counter
+import contextlib
+import os
+import sys
+import threading
+from types import FrameType
+from typing import Dict, Iterator, List, Optional
+
+
+def frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    return (
+        f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    )
+
+
+class SessionProfiler:
+    def __init__(self, prefix: str, interval: float = 0.001) -> None:
+        self.prefix = prefix
+        self.interval = interval
+        self.profiles: Dict[str, cProfile.Profile] = {}
+        self.stacks: Counter[str] = Counter()
+        self.phase: Optional[str] = None
+
+        self.target_thread = threading.get_ident()
+        self.stopped = threading.Event()
+        self.sampler = threading.Thread(target=self.sample, daemon=True)
+        self.sampler.start()
+
+    @contextlib.contextmanager
+    def scope(self, phase: str) -> Iterator[None]:
+        # a scope inside another pauses the outer one, so its time is only
+        # counted under the inner phase
+        outer = self.phase
+        if outer is not None:
+            self.profiles[outer].disable()
+
+        profile = self.profiles.get(phase)
+        if profile is None:
+            profile = self.profiles[phase] = cProfile.Profile()
+
+        self.phase = phase
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self.phase = outer
+            if outer is not None:
+                self.profiles[outer].enable()
+
+    def sample(self) -> None:
+        while not self.stopped.wait(self.interval):
+            phase = self.phase
+            if phase is None:
+                continue
+
+            frame = sys._current_frames().get(self.target_thread)
+            stack: List[str] = []
+            while frame is not None:
+                stack.append(frame_label(frame))
+                frame = frame.f_back
+            stack.append(phase)
+
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def write(self) -> List[str]:
+        self.stopped.set()
+        self.sampler.join()
+
+        paths = []
+        for phase, profile in self.profiles.items():
+            path = f"{self.prefix}.{phase}.pstats"
+            profile.dump_stats(path)
+            paths.append(path)
+
+        path = f"{self.prefix}.collapsed"
+        with open(path, "w") as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write(f"{stack} {count}\n")
+        paths.append(path)
+
+        return paths
+
+
+def scope(
+    profiler: Optional[SessionProfiler], phase: str
+) -> contextlib.AbstractContextManager:
+    # lets callers wrap code the same way whether or not profiling is on
+    if profiler is None:
+        return contextlib.nullcontext()
+    return profiler.scope(phase)
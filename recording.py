@@ -0,0 +1,281 @@
+"""Compact recordings of everything drawn to the screen.
+
+A recording is a header followed by frame records. Keyframes hold a whole
+screen and are written every `keyframe_interval` seconds; every other
+record only holds the cells that changed since the frame before it.
+Payloads are zlib compressed, so long sessions stay small. Closing the
+recorder appends an index of keyframes, which lets playback seek straight
+to the keyframe before any point in time. Recordings cut short without an
+index still play, the index is then rebuilt by skimming record headers.
+
+    python main.py --record game.rec
+    python recording.py play game.rec --seek 600 --speed 4
+    python recording.py info game.rec
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import json
+import struct
+import time
+import zlib
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+
+import numpy as np
+from tcod.console import Console
+
+from terminal import row_major
+
+MAGIC = b"RLREC1\n"
+
+KEYFRAME = 0
+DELTA = 1
+INDEX = 2
+
+# kind, timestamp in seconds, payload length
+record_header = struct.Struct("<Bdi")
+# offset of the index record, written as the very last bytes of the file
+index_footer = struct.Struct("<Q")
+
+# packed on-disk cell, the same fields as Console.rgb without the padding
+cell_dt = np.dtype([("ch", "<i4"), ("fg", "u1", 3), ("bg", "u1", 3)])
+
+
+def capture_cells(console: Console) -> np.ndarray:
+    rgb = row_major(console)
+    cells = np.empty(rgb.shape, dtype=cell_dt)
+    cells["ch"] = rgb["ch"]
+    cells["fg"] = rgb["fg"][..., :3]
+    cells["bg"] = rgb["bg"][..., :3]
+    return cells
+
+
+def encode_record(kind: int, timestamp: float, payload: bytes) -> bytes:
+    payload = zlib.compress(payload)
+    return record_header.pack(kind, timestamp, len(payload)) + payload
+
+
+def read_record(stream: BinaryIO) -> Optional[Tuple[int, float, bytes]]:
+    # (kind, timestamp, payload), or None at the end of a complete record
+    header = stream.read(record_header.size)
+    if len(header) < record_header.size:
+        return None
+    kind, timestamp, length = record_header.unpack(header)
+    payload = stream.read(length)
+    if len(payload) < length:
+        return None
+    return kind, timestamp, zlib.decompress(payload)
+
+
+def keyframe_payload(cells: np.ndarray) -> bytes:
+    height, width = cells.shape
+    return struct.pack("<II", width, height) + cells.tobytes()
+
+
+def delta_payload(cells: np.ndarray, previous: np.ndarray) -> Optional[bytes]:
+    # None when nothing changed
+    changed = np.flatnonzero(cells != previous).astype("<u4")
+    if not len(changed):
+        return None
+    return (
+        struct.pack("<I", len(changed))
+        + changed.tobytes()
+        + cells.ravel()[changed].tobytes()
+    )
+
+
+def apply_record(
+    kind: int, payload: bytes, cells: Optional[np.ndarray]
+) -> Optional[np.ndarray]:
+    # the screen after this record; deltas update `cells` in place
+    if kind == KEYFRAME:
+        width, height = struct.unpack_from("<II", payload)
+        cells = np.frombuffer(payload, dtype=cell_dt, offset=8).copy()
+        return cells.reshape(height, width)
+
+    if kind == DELTA and cells is not None:
+        (count,) = struct.unpack_from("<I", payload)
+        changed = np.frombuffer(payload, dtype="<u4", count=count, offset=4)
+        values = np.frombuffer(payload, dtype=cell_dt, offset=4 + 4 * count)
+        cells.ravel()[changed] = values
+
+    return cells
+
+
+class Recorder:
+    def __init__(self, path: str, keyframe_interval: float = 10.0) -> None:
+        self.file: BinaryIO = open(path, "wb")
+        self.keyframe_interval = keyframe_interval
+        self.start = time.perf_counter()
+        self.previous: Optional[np.ndarray] = None
+        self.last_keyframe = float("-inf")
+        self.last_frame = 0.0
+        self.keyframes: List[Tuple[float, int]] = []
+
+        self.file.write(MAGIC)
+        self.file.write(
+            json.dumps({"keyframe_interval": keyframe_interval}).encode() + b"\n"
+        )
+
+    def write_record(self, kind: int, timestamp: float, payload: bytes) -> None:
+        self.file.write(encode_record(kind, timestamp, payload))
+
+    def capture(self, console: Console) -> None:
+        timestamp = time.perf_counter() - self.start
+        cells = capture_cells(console)
+        previous = self.previous
+
+        if (
+            previous is None
+            or previous.shape != cells.shape
+            or timestamp - self.last_keyframe >= self.keyframe_interval
+        ):
+            self.keyframes.append((timestamp, self.file.tell()))
+            self.write_record(KEYFRAME, timestamp, keyframe_payload(cells))
+            self.last_keyframe = timestamp
+        else:
+            payload = delta_payload(cells, previous)
+            if payload is None:
+                return
+            self.write_record(DELTA, timestamp, payload)
+
+        self.previous = cells
+        self.last_frame = timestamp
+
+    def close(self) -> None:
+        offset = self.file.tell()
+        index = {"keyframes": self.keyframes, "duration": self.last_frame}
+        self.write_record(INDEX, self.last_frame, json.dumps(index).encode())
+        self.file.write(index_footer.pack(offset))
+        self.file.close()
+
+
+class Recording:
+    def __init__(self, path: str) -> None:
+        self.file: BinaryIO = open(path, "rb")
+        if self.file.readline() != MAGIC:
+            raise ValueError(f"{path} is not a recording.")
+        self.header = json.loads(self.file.readline())
+        self.records_start = self.file.tell()
+        self.keyframes, self.duration = self.read_index()
+        self.keyframe_times = [timestamp for timestamp, _ in self.keyframes]
+
+    def read_index(self) -> Tuple[List[Tuple[float, int]], float]:
+        # keyframe (timestamp, offset) pairs and the time of the last frame
+        self.file.seek(0, 2)
+        if self.file.tell() - self.records_start >= index_footer.size:
+            self.file.seek(-index_footer.size, 2)
+            (offset,) = index_footer.unpack(self.file.read(index_footer.size))
+            if self.records_start <= offset < self.file.tell():
+                self.file.seek(offset)
+                record = read_record(self.file)
+                if record and record[0] == INDEX:
+                    index = json.loads(record[2])
+                    keyframes = [
+                        (timestamp, at) for timestamp, at in index["keyframes"]
+                    ]
+                    return keyframes, index["duration"]
+
+        # no index, so skim every record header for the keyframes
+        keyframes = []
+        duration = 0.0
+        self.file.seek(self.records_start)
+        while True:
+            at = self.file.tell()
+            header = self.file.read(record_header.size)
+            if len(header) < record_header.size:
+                break
+            kind, timestamp, length = record_header.unpack(header)
+            if kind == INDEX:
+                break
+            if kind == KEYFRAME:
+                keyframes.append((timestamp, at))
+            duration = timestamp
+            self.file.seek(length, 1)
+        return keyframes, duration
+
+    def frames(self, start: float = 0.0) -> Iterator[Tuple[float, np.ndarray]]:
+        # (timestamp, cells) for every frame from the keyframe before `start`
+        i = max(0, bisect.bisect_right(self.keyframe_times, start) - 1)
+        if not self.keyframes:
+            return
+        self.file.seek(self.keyframes[i][1])
+
+        cells: Optional[np.ndarray] = None
+        while True:
+            record = read_record(self.file)
+            if record is None or record[0] == INDEX:
+                return
+            kind, timestamp, payload = record
+
+            cells = apply_record(kind, payload, cells)
+            if cells is not None and timestamp >= start:
+                yield timestamp, cells
+
+    def frame_at(self, timestamp: float) -> Optional[np.ndarray]:
+        # the screen as it was at `timestamp`
+        i = bisect.bisect_right(self.keyframe_times, timestamp) - 1
+        start = self.keyframe_times[max(0, i)] if self.keyframes else 0.0
+
+        last = None
+        for frame_time, cells in self.frames(start):
+            if frame_time > timestamp:
+                break
+            # frames() keeps updating the same array in place
+            last = cells.copy()
+        return last
+
+
+def to_console(cells: np.ndarray) -> Console:
+    height, width = cells.shape
+    console = Console(width, height)
+    console.rgb["ch"] = cells["ch"]
+    console.rgb["fg"] = cells["fg"]
+    console.rgb["bg"] = cells["bg"]
+    return console
+
+
+def play(path: str, seek: float, speed: float) -> None:
+    from terminal import AnsiRenderer
+
+    recording = Recording(path)
+    renderer = AnsiRenderer()
+    renderer.open()
+    try:
+        started = time.perf_counter()
+        for timestamp, cells in recording.frames(seek):
+            delay = (timestamp - seek) / speed - (time.perf_counter() - started)
+            if delay > 0:
+                time.sleep(delay)
+            renderer.present(to_console(cells))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        renderer.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    play_parser = commands.add_parser("play", help="play back in this terminal")
+    play_parser.add_argument("path")
+    play_parser.add_argument("--seek", type=float, default=0.0, help="start time")
+    play_parser.add_argument("--speed", type=float, default=1.0)
+
+    info_parser = commands.add_parser("info", help="show length and keyframes")
+    info_parser.add_argument("path")
+
+    args = parser.parse_args()
+    if args.command == "play":
+        play(args.path, args.seek, args.speed)
+    else:
+        recording = Recording(args.path)
+        print(f"duration: {recording.duration:.1f}s")
+        print(f"keyframes: {len(recording.keyframes)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,8 @@ from __future__ import annotations
 from typing import TYPE_CHECKING, Tuple
 
 import color
+from layers import Layer
+import metrics
 
 if TYPE_CHECKING:
     from tcod.console import Console
@@ -21,17 +23,24 @@ def get_names_at_loc(x: int, y: int, map: GameMap) -> str:
     return names.capitalize()
 
 
+bar_layer = Layer()
+level_layer = Layer()
+
+
 def render_bar(console: Console, cur_val: int, max_val: int, total_width: int) -> None:
-    bar_width = int(float(cur_val) / max_val * total_width)
+    def draw(layer: Console) -> None:
+        bar_width = int(float(cur_val) / max_val * total_width)
 
-    console.draw_rect(x=0, y=45, width=total_width, height=1, ch=1, bg=color.bar_empty)
+        layer.draw_rect(x=0, y=0, width=total_width, height=1, ch=1, bg=color.bar_empty)
 
-    if bar_width > 0:
-        console.draw_rect(
-            x=0, y=45, width=bar_width, height=1, ch=1, bg=color.bar_filled
-        )
+        if bar_width > 0:
+            layer.draw_rect(
+                x=0, y=0, width=bar_width, height=1, ch=1, bg=color.bar_filled
+            )
 
-    console.print(x=1, y=45, string=f"HP: {cur_val}/{max_val}", fg=color.bar_text)
+        layer.print(x=1, y=0, string=f"HP: {cur_val}/{max_val}", fg=color.bar_text)
+
+    bar_layer.render(console, 0, 45, total_width, 1, (cur_val, max_val), draw)
 
 
 def render_names(console: Console, engine: Engine) -> None:
@@ -44,4 +53,47 @@ def render_names(console: Console, engine: Engine) -> None:
 
 def render_level(console: Console, level: int, location: Tuple[int, int]) -> None:
     x, y = location
-    console.print(x=x, y=y, string=f"Dungeon Level: {level}")
+    text = f"Dungeon Level: {level}"
+    level_layer.render(
+        console, x, y, len(text), 1, text, lambda layer: layer.print(0, 0, text)
+    )
+
+
+def render_perf_overlay(console: Console, engine: Engine) -> None:
+    # rolling averages of the latest frames and turns, in milliseconds
+    histograms = metrics.registry.histograms
+
+    def ms(name: str) -> str:
+        histogram = histograms.get(name)
+        return f"{histogram.rolling_mean * 1000:6.2f}" if histogram else "   n/a"
+
+    actors = sum(1 for _ in engine.map.actors)
+    memory = metrics.memory_in_use()
+
+    lines = [
+        f"frame   {ms('frame.render')} ms",
+        f"present {ms('frame.present')} ms",
+        f"player  {ms('turn.player_action')} ms",
+        f"mob ai  {ms('turn.mobs')} ms",
+        f"fov     {ms('turn.fov')} ms",
+        f"render  {ms('render')} ms",
+        f"entities {len(engine.map.entities):5}",
+        f"actors   {actors:5}",
+        f"memory  {memory / 2**20:6.1f} MB" if memory else "memory     n/a",
+    ]
+
+    width = max(len(line) for line in lines) + 2
+    x = console.width - width
+
+    console.draw_frame(
+        x=x,
+        y=0,
+        width=width,
+        height=len(lines) + 2,
+        title="Perf",
+        clear=True,
+        fg=color.white,
+        bg=color.black,
+    )
+    for i, line in enumerate(lines):
+        console.print(x=x + 1, y=i + 1, string=line, fg=color.perf_text)
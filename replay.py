@@ -0,0 +1,244 @@
+"""Record the player's actions and replay them exactly.
+
+An action log starts with the seed the game was generated from, followed
+by one fixed size record per action the player took: action type,
+direction, inventory index, target, milliseconds since the start and the
+state hash (see zobrist.py) from just before the action. Level up choices
+are recorded too, as they change the game without going through an
+Action. Replaying feeds the same actions through the same turn logic, so
+the game plays out exactly as it did, and the hashes confirm it turn by
+turn.
+
+    python main.py --record-actions game.actions
+    python replay.py game.actions                  # headless, full speed
+    python replay.py game.actions --render --speed 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import struct
+import time
+from typing import BinaryIO, Iterator, List, Tuple, Type, TYPE_CHECKING
+
+import actions
+import color
+import exceptions
+import setup_game
+
+if TYPE_CHECKING:
+    from engine import Engine
+
+MAGIC = b"RLACT2\n"
+
+seed_format = struct.Struct("<Q")
+# type, dx, dy, item index, target x, target y, milliseconds since start,
+# state hash before the action
+record_format = struct.Struct("<BbbBhhIQ")
+
+NO_ITEM = 0xFF
+NO_TARGET = -1
+
+# record types are indexes into this list, so only ever append to it
+ACTION_TYPES: List[Type[actions.Action]] = [
+    actions.WaitAction,
+    actions.BumpAction,
+    actions.MovementAction,
+    actions.MeleeAction,
+    actions.PickupAction,
+    actions.DescendAction,
+    actions.ItemAction,
+    actions.DropItem,
+    actions.EquipAction,
+]
+LEVEL_UP = 0xFF
+
+ActionRecord = Tuple[int, int, int, int, int, int, int, int]
+
+
+class ReplayDesync(Exception):
+    """Raised when a replayed game stops matching the recorded one."""
+
+
+class ActionRecorder:
+    def __init__(self, path: str, engine: Engine) -> None:
+        if engine.seed is None:
+            raise ValueError("Only games started by new_game can be recorded.")
+        self.engine = engine
+        self.file: BinaryIO = open(path, "wb")
+        self.start = time.perf_counter()
+        self.file.write(MAGIC)
+        self.file.write(seed_format.pack(engine.seed))
+        self.file.flush()
+
+    def write(
+        self,
+        kind: int,
+        dx: int = 0,
+        dy: int = 0,
+        item_index: int = NO_ITEM,
+        target: Tuple[int, int] = (NO_TARGET, NO_TARGET),
+    ) -> None:
+        elapsed = int((time.perf_counter() - self.start) * 1000)
+        state_hash = self.engine.state_hash()
+        self.file.write(
+            record_format.pack(kind, dx, dy, item_index, *target, elapsed, state_hash)
+        )
+        # flushed every turn so a crash still leaves a usable log
+        self.file.flush()
+
+    def record(self, action: actions.Action) -> None:
+        if type(action) not in ACTION_TYPES:
+            raise ValueError(
+                f"{type(action).__name__} can't be recorded, add it to ACTION_TYPES."
+            )
+        kind = ACTION_TYPES.index(type(action))
+        if isinstance(action, actions.ActionWithDirection):
+            self.write(kind, action.dx, action.dy)
+        elif isinstance(action, actions.ItemAction):
+            index = action.entity.inventory.items.index(action.item)
+            self.write(kind, item_index=index, target=action.target_xy)
+        elif isinstance(action, actions.EquipAction):
+            index = action.entity.inventory.items.index(action.item)
+            self.write(kind, item_index=index)
+        else:
+            self.write(kind)
+
+    def record_level_up(self, choice: int) -> None:
+        # choice is the menu index: max hp, power, defense
+        self.write(LEVEL_UP, item_index=choice)
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class ActionLog:
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not an action log.")
+            (self.seed,) = seed_format.unpack(f.read(seed_format.size))
+            data = f.read()
+
+        # a crash mid-write can leave half a record at the end
+        usable = len(data) - len(data) % record_format.size
+        self.records: List[ActionRecord] = list(
+            record_format.iter_unpack(data[:usable])
+        )
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+
+def apply_level_up(engine: Engine, choice: int) -> None:
+    level = engine.player.level
+    if choice == 0:
+        level.increase_max_hp()
+    elif choice == 1:
+        level.increase_power()
+    elif choice == 2:
+        level.increase_defense()
+
+
+def decode_action(engine: Engine, record: ActionRecord) -> actions.Action:
+    kind, dx, dy, item_index, target_x, target_y, _, _ = record
+    player = engine.player
+    action_type = ACTION_TYPES[kind]
+
+    if issubclass(action_type, actions.ActionWithDirection):
+        return action_type(player, dx, dy)
+
+    if issubclass(action_type, actions.ItemAction):
+        item = player.inventory.items[item_index]
+        target = None if target_x == NO_TARGET else (target_x, target_y)
+        return action_type(player, item, target)
+
+    if action_type is actions.EquipAction:
+        return actions.EquipAction(player, player.inventory.items[item_index])
+
+    return action_type(player)
+
+
+def replay_turns(
+    engine: Engine, records: List[ActionRecord], verify: bool = True
+) -> Iterator[ActionRecord]:
+    """Step a game from new_game(seed) through the log, yielding each record.
+
+    Turns go through Engine.handle_player_turn exactly as
+    EventHandler.handle_action does, impossible actions included. With
+    `verify`, ReplayDesync is raised as soon as the state hash differs from
+    the recorded one.
+    """
+    for i, record in enumerate(records):
+        if verify and engine.state_hash() != record[-1]:
+            raise ReplayDesync(f"Game state differs before action {i}.")
+
+        if record[0] == LEVEL_UP:
+            apply_level_up(engine, record[3])
+        else:
+            try:
+                engine.handle_player_turn(decode_action(engine, record))
+            except exceptions.Impossible as exc:
+                engine.message_log.add_message(exc.args[0], color.impossible)
+        yield record
+
+
+def replay_headless(log: ActionLog, verify: bool = True) -> Engine:
+    engine = setup_game.new_game(log.seed)
+    for _ in replay_turns(engine, log.records, verify):
+        pass
+    return engine
+
+
+def replay_rendered(path: str, speed: float) -> None:
+    from tcod.console import Console
+
+    from terminal import AnsiRenderer
+
+    log = ActionLog(path)
+    engine = setup_game.new_game(log.seed)
+    console = Console(82, 50, order="F")
+    renderer = AnsiRenderer()
+    renderer.open()
+    try:
+        started = time.perf_counter()
+        for record in replay_turns(engine, log.records):
+            delay = record[6] / 1000 / speed - (time.perf_counter() - started)
+            if delay > 0:
+                time.sleep(delay)
+            console.clear()
+            engine.render(console)
+            renderer.present(console)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        renderer.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path")
+    parser.add_argument(
+        "--render", action="store_true", help="show the game in this terminal"
+    )
+    parser.add_argument(
+        "--speed", type=float, default=1.0, help="playback speed with --render"
+    )
+    args = parser.parse_args()
+
+    if args.render:
+        replay_rendered(args.path, args.speed)
+        return
+
+    start = time.perf_counter()
+    log = ActionLog(args.path)
+    engine = replay_headless(log)
+    elapsed = time.perf_counter() - start
+    print(
+        f"Replayed {len(log)} actions in {elapsed:.2f}s: floor "
+        f"{engine.world.current_floor}, player hp {engine.player.fighter.hp}."
+    )
+
+
+if __name__ == "__main__":
+    main()
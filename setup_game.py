@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 import copy
-from typing import Optional
+import random
+from typing import Optional, TYPE_CHECKING
 
 import tcod
 import libtcodpy
@@ -14,30 +15,45 @@ import color
 from engine import Engine
 import entity_factory
 import input_handers
+from layers import Layer
 from map import GameWorld
+from map_settings import (
+    MAP_HEIGHT,
+    MAP_WIDTH,
+    MAX_ROOMS,
+    ROOM_MAX_SIZE,
+    ROOM_MIN_SIZE,
+)
+import profiling
+
+if TYPE_CHECKING:
+    from replay import ActionRecorder
 
 background = tcod.image.load("menu_background.png")[:, :, :3]
 
+# the whole main menu is static, so it is drawn once and blitted after that
+menu_layer = Layer()
 
-def new_game() -> Engine:
-    map_width = 80
-    map_height = 43
 
-    room_max_size = 10
-    room_min_size = 6
-    max_rooms = 30
+def new_game(seed: Optional[int] = None) -> Engine:
+    # everything random in a game comes from the global random module, so
+    # the seed is all a replay needs to rebuild the same dungeon
+    if seed is None:
+        seed = random.randrange(2**32)
+    random.seed(seed)
 
     player = copy.deepcopy(entity_factory.player)
 
     engine = Engine(player=player)
+    engine.seed = seed
 
     engine.world = GameWorld(
         engine=engine,
-        max_rooms=max_rooms,
-        room_min_size=room_min_size,
-        room_max_size=room_max_size,
-        map_width=map_width,
-        map_height=map_height,
+        max_rooms=MAX_ROOMS,
+        room_min_size=ROOM_MIN_SIZE,
+        room_max_size=ROOM_MAX_SIZE,
+        map_width=MAP_WIDTH,
+        map_height=MAP_HEIGHT,
     )
 
     engine.world.generate_floor()
@@ -55,7 +71,28 @@ def load_game(filename: str) -> Engine:
 
 
 class MainMenu(input_handers.BaseEventHandler):
+    def __init__(
+        self,
+        action_log: Optional[str] = None,
+        ai_budget: Optional[float] = None,
+        profiler: Optional[profiling.SessionProfiler] = None,
+    ) -> None:
+        # new games record their actions here, continued ones can't be
+        # replayed since the random state isn't saved
+        self.action_log = action_log
+        # seconds per turn for mob planning, see Engine.ai_budget
+        self.ai_budget = ai_budget
+        self.action_recorder: Optional[ActionRecorder] = None
+        # starting a game is profiled as gameplay, though the key press that
+        # starts it arrives while the menu is up
+        self.profiler = profiler
+
     def on_render(self, console: Console) -> None:
+        menu_layer.render(
+            console, 0, 0, console.width, console.height, None, self.draw_menu
+        )
+
+    def draw_menu(self, console: Console) -> None:
         console.draw_semigraphics(background, 0, 0)
 
         console.print(
@@ -94,13 +131,33 @@ class MainMenu(input_handers.BaseEventHandler):
             raise SystemExit()
         elif event.sym == tcod.event.KeySym.c:
             try:
-                return input_handers.MainGameEventHandler(load_game("savegame.sav"))
+                with profiling.scope(self.profiler, "gameplay"):
+                    engine = load_game("savegame.sav")
             except FileNotFoundError:
                 return input_handers.PopupMessage(self, "No saved game.")
             except Exception as exc:
                 traceback.print_exc()
                 return input_handers.PopupMessage(self, f"Failed to load save:\n{exc}")
+            # the budget belongs to this session, not to the save
+            engine.ai_budget = self.ai_budget
+            return input_handers.MainGameEventHandler(engine)
         elif event.sym == tcod.event.KeySym.n:
-            return input_handers.MainGameEventHandler(new_game())
+            with profiling.scope(self.profiler, "gameplay"):
+                engine = new_game()
+            engine.ai_budget = self.ai_budget
+            if self.action_log:
+                from replay import ActionRecorder
+
+                # a second new game starts the log over
+                self.close()
+                self.action_recorder = ActionRecorder(self.action_log, engine)
+                engine.action_recorder = self.action_recorder
+            return input_handers.MainGameEventHandler(engine)
 
         return None
+
+    def close(self) -> None:
+        # the log is flushed every turn, this finishes it off on exit
+        if self.action_recorder is not None:
+            self.action_recorder.close()
+            self.action_recorder = None
@@ -0,0 +1,294 @@
+"""Local server that lets any number of viewers watch a game live.
+
+The game thread hands each drawn frame to `SpectatorServer.capture`,
+which only copies the cells and wakes the server thread, so the game
+never waits on the network. The server thread encodes one delta per
+frame, using the record format from recording.py, and queues the same
+bytes for every viewer. New viewers and viewers that fell behind get a
+keyframe instead. A viewer that keeps falling behind is disconnected.
+
+    python main.py --spectate 7777
+    python spectator.py watch localhost:7777
+"""
+
+from __future__ import annotations
+
+import argparse
+from collections import deque
+import json
+import selectors
+import socket
+import threading
+import time
+from typing import Deque, Dict, Optional
+
+import numpy as np
+from tcod.console import Console
+
+from recording import (
+    DELTA,
+    KEYFRAME,
+    MAGIC,
+    apply_record,
+    capture_cells,
+    delta_payload,
+    encode_record,
+    keyframe_payload,
+    read_record,
+    to_console,
+)
+
+
+class Viewer:
+    def __init__(self, sock: socket.socket) -> None:
+        self.sock = sock
+        # whole encoded records, the first of which may be partly sent
+        self.pending: Deque[bytes] = deque()
+        self.pending_bytes = 0
+        self.sent = 0
+        self.needs_keyframe = True
+        self.overflows = 0
+
+    def queue(self, record: bytes) -> None:
+        self.pending.append(record)
+        self.pending_bytes += len(record)
+
+    def drop_backlog(self) -> None:
+        # keep only a record that is partly sent, it can't be cut short
+        keep = self.pending.popleft() if self.pending and self.sent else None
+        self.pending.clear()
+        self.pending_bytes = 0
+        if keep is not None:
+            self.queue(keep)
+        self.needs_keyframe = True
+        self.overflows += 1
+
+
+class SpectatorServer:
+    def __init__(
+        self,
+        port: int,
+        host: str = "127.0.0.1",
+        max_backlog: int = 1 << 20,
+        max_overflows: int = 5,
+    ) -> None:
+        self.max_backlog = max_backlog
+        self.max_overflows = max_overflows
+        self.start = time.perf_counter()
+
+        self.listener = socket.create_server((host, port))
+        self.listener.setblocking(False)
+        self.wake_reader, self.wake_writer = socket.socketpair()
+        self.wake_reader.setblocking(False)
+        self.wake_writer.setblocking(False)
+
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.listener, selectors.EVENT_READ)
+        self.selector.register(self.wake_reader, selectors.EVENT_READ)
+        self.viewers: Dict[socket.socket, Viewer] = {}
+
+        # the newest frame from the game thread, handed over under the lock
+        self.lock = threading.Lock()
+        self.latest: Optional[np.ndarray] = None
+        self.latest_time = 0.0
+        self.closing = False
+
+        # only touched by the server thread
+        self.previous: Optional[np.ndarray] = None
+
+        self.thread = threading.Thread(target=self.serve, daemon=True)
+        self.thread.start()
+
+    def capture(self, console: Console) -> None:
+        cells = capture_cells(console)
+        with self.lock:
+            self.latest = cells
+            self.latest_time = time.perf_counter() - self.start
+        self.wake()
+
+    def wake(self) -> None:
+        try:
+            self.wake_writer.send(b"\0")
+        except (BlockingIOError, OSError):
+            # already woken and not caught up yet, which is just as good
+            pass
+
+    def close(self) -> None:
+        self.closing = True
+        self.wake()
+        self.thread.join()
+
+    def serve(self) -> None:
+        try:
+            while not self.closing:
+                for key, events in self.selector.select():
+                    sock = key.fileobj
+                    if sock is self.listener:
+                        self.accept()
+                    elif sock is self.wake_reader:
+                        self.drain_wakeups()
+                        self.publish()
+                    elif sock in self.viewers:
+                        viewer = self.viewers[sock]
+                        if events & selectors.EVENT_WRITE:
+                            self.flush(viewer)
+                        if events & selectors.EVENT_READ:
+                            self.read(viewer)
+        finally:
+            for viewer in list(self.viewers.values()):
+                self.disconnect(viewer)
+            self.selector.close()
+            self.listener.close()
+            self.wake_reader.close()
+            self.wake_writer.close()
+
+    def accept(self) -> None:
+        try:
+            sock, _ = self.listener.accept()
+        except BlockingIOError:
+            return
+        sock.setblocking(False)
+        viewer = Viewer(sock)
+        viewer.queue(MAGIC + json.dumps({"live": True}).encode() + b"\n")
+        self.viewers[sock] = viewer
+        self.selector.register(sock, selectors.EVENT_READ)
+
+        # late joiners get the current screen straight away
+        if self.previous is not None:
+            viewer.queue(encode_record(KEYFRAME, 0.0, keyframe_payload(self.previous)))
+            viewer.needs_keyframe = False
+        self.flush(viewer)
+
+    def drain_wakeups(self) -> None:
+        try:
+            while self.wake_reader.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def publish(self) -> None:
+        with self.lock:
+            cells, timestamp = self.latest, self.latest_time
+            self.latest = None
+        if cells is None:
+            return
+
+        previous = self.previous
+        self.previous = cells
+
+        # encoded at most once per frame however many viewers there are
+        delta = None
+        unchanged = False
+        if previous is not None and previous.shape == cells.shape:
+            payload = delta_payload(cells, previous)
+            if payload is None:
+                unchanged = True
+            else:
+                delta = encode_record(DELTA, timestamp, payload)
+        keyframe = None
+
+        for viewer in list(self.viewers.values()):
+            if unchanged and not viewer.needs_keyframe:
+                # nothing new to show this viewer
+                continue
+            if viewer.needs_keyframe or delta is None:
+                if keyframe is None:
+                    keyframe = encode_record(
+                        KEYFRAME, timestamp, keyframe_payload(cells)
+                    )
+                viewer.queue(keyframe)
+                viewer.needs_keyframe = False
+            else:
+                viewer.queue(delta)
+
+            if viewer.pending_bytes > self.max_backlog:
+                viewer.drop_backlog()
+                if viewer.overflows > self.max_overflows:
+                    self.disconnect(viewer)
+                    continue
+
+            self.flush(viewer)
+
+    def flush(self, viewer: Viewer) -> None:
+        try:
+            while viewer.pending:
+                record = viewer.pending[0]
+                sent = viewer.sock.send(record[viewer.sent :])
+                viewer.sent += sent
+                if viewer.sent < len(record):
+                    break
+                viewer.pending.popleft()
+                viewer.pending_bytes -= len(record)
+                viewer.sent = 0
+        except BlockingIOError:
+            pass
+        except OSError:
+            self.disconnect(viewer)
+            return
+
+        if not viewer.pending:
+            # caught up, so forgive earlier slowness
+            viewer.overflows = 0
+
+        events = selectors.EVENT_READ
+        if viewer.pending:
+            events |= selectors.EVENT_WRITE
+        self.selector.modify(viewer.sock, events)
+
+    def read(self, viewer: Viewer) -> None:
+        # viewers don't send anything, so this only notices hangups
+        try:
+            data = viewer.sock.recv(4096)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self.disconnect(viewer)
+
+    def disconnect(self, viewer: Viewer) -> None:
+        if self.viewers.pop(viewer.sock, None) is None:
+            return
+        self.selector.unregister(viewer.sock)
+        viewer.sock.close()
+
+
+def watch(address: str) -> None:
+    from terminal import AnsiRenderer
+
+    host, _, port = address.rpartition(":")
+    with socket.create_connection((host or "127.0.0.1", int(port))) as sock:
+        stream = sock.makefile("rb")
+        if stream.readline() != MAGIC:
+            raise SystemExit(f"{address} is not a spectator server.")
+        stream.readline()
+
+        renderer = AnsiRenderer()
+        renderer.open()
+        try:
+            cells = None
+            while True:
+                record = read_record(stream)
+                if record is None:
+                    break
+                kind, _, payload = record
+                cells = apply_record(kind, payload, cells)
+                if cells is not None:
+                    renderer.present(to_console(cells))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            renderer.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    watch_parser = commands.add_parser("watch", help="watch a game in this terminal")
+    watch_parser.add_argument("address", help="HOST:PORT of the game")
+    args = parser.parse_args()
+    watch(args.address)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""ANSI terminal backend, for playing over SSH or in CI without a display.
+
+AnsiRenderer draws a root Console on a 24-bit colour terminal. It only
+writes the cells that changed since the last frame, and skips cursor
+moves and colour codes that are already in effect. TerminalInput turns
+raw key presses into the tcod KeyDown events the handlers expect.
+"""
+
+from __future__ import annotations
+
+import os
+import select
+import sys
+from typing import IO, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import tcod.event
+from tcod.console import Console
+
+CSI = "\x1b["
+
+Color = Tuple[int, int, int]
+
+
+def row_major(console: Console) -> np.ndarray:
+    # console.rgb indexed as [y, x], whichever order the console was made in
+    rgb = console.rgb
+    if rgb.shape != (console.height, console.width) or (
+        rgb.flags.f_contiguous and not rgb.flags.c_contiguous
+    ):
+        rgb = rgb.T
+    return rgb
+
+
+class AnsiRenderer:
+    def __init__(self, stream: IO[str] = sys.stdout) -> None:
+        self.stream = stream
+        self.previous: Optional[np.ndarray] = None
+        self.cursor: Optional[Tuple[int, int]] = None
+        self.fg: Optional[Color] = None
+        self.bg: Optional[Color] = None
+
+    def open(self) -> None:
+        # alternate screen, hidden cursor, cleared
+        self.stream.write(f"{CSI}?1049h{CSI}?25l{CSI}2J")
+        self.stream.flush()
+
+    def close(self) -> None:
+        self.stream.write(f"{CSI}0m{CSI}?25h{CSI}?1049l")
+        self.stream.flush()
+
+    def invalidate(self) -> None:
+        # next present redraws every cell, e.g. after the terminal was cleared
+        self.previous = None
+        self.cursor = self.fg = self.bg = None
+
+    def present(self, console: Console) -> int:
+        # returns the number of cells written
+        frame = row_major(console)
+
+        if self.previous is None or self.previous.shape != frame.shape:
+            changed = np.ones(frame.shape, dtype=bool)
+        else:
+            previous = self.previous
+            changed = (
+                (frame["ch"] != previous["ch"])
+                | (frame["fg"] != previous["fg"]).any(axis=-1)
+                | (frame["bg"] != previous["bg"]).any(axis=-1)
+            )
+
+        ys, xs = np.nonzero(changed)
+        chars = frame["ch"][ys, xs].tolist()
+        fgs = frame["fg"][ys, xs, :3].tolist()
+        bgs = frame["bg"][ys, xs, :3].tolist()
+
+        out: List[str] = []
+        for x, y, ch, fg, bg in zip(xs.tolist(), ys.tolist(), chars, fgs, bgs):
+            if self.cursor != (x, y):
+                out.append(f"{CSI}{y + 1};{x + 1}H")
+
+            codes = []
+            fg = tuple(fg)
+            bg = tuple(bg)
+            if fg != self.fg:
+                codes.append("38;2;%d;%d;%d" % fg)
+                self.fg = fg
+            if bg != self.bg:
+                codes.append("48;2;%d;%d;%d" % bg)
+                self.bg = bg
+            if codes:
+                out.append(f"{CSI}{';'.join(codes)}m")
+
+            out.append(chr(ch) if ch >= 0x20 else " ")
+            self.cursor = (x + 1, y)
+
+        if out:
+            self.stream.write("".join(out))
+            self.stream.flush()
+
+        self.previous = frame.copy()
+        return len(chars)
+
+
+K = tcod.event.KeySym
+
+# escape sequences sent by common terminals for the keys the game uses
+ESCAPE_SEQUENCES: Dict[str, int] = {
+    "[A": K.UP,
+    "[B": K.DOWN,
+    "[C": K.RIGHT,
+    "[D": K.LEFT,
+    "[H": K.HOME,
+    "[F": K.END,
+    "[1~": K.HOME,
+    "[4~": K.END,
+    "[5~": K.PAGEUP,
+    "[6~": K.PAGEDOWN,
+    "OH": K.HOME,
+    "OF": K.END,
+    "OR": K.F3,
+    "[13~": K.F3,
+}
+
+CHARACTER_KEYS: Dict[str, Tuple[int, int]] = {
+    "\r": (K.RETURN, tcod.event.Modifier.NONE),
+    "\n": (K.RETURN, tcod.event.Modifier.NONE),
+    ".": (K.PERIOD, tcod.event.Modifier.NONE),
+    ">": (K.PERIOD, tcod.event.Modifier.LSHIFT),
+    "/": (K.SLASH, tcod.event.Modifier.NONE),
+}
+
+
+def key_event(sym: int, mod: int = tcod.event.Modifier.NONE) -> tcod.event.KeyDown:
+    return tcod.event.KeyDown(0, sym, mod)
+
+
+def parse_keys(text: str) -> Iterator[tcod.event.Event]:
+    i = 0
+    while i < len(text):
+        char = text[i]
+        i += 1
+
+        if char == "\x03":
+            yield tcod.event.Quit()
+        elif char == "\x1b":
+            for sequence, sym in ESCAPE_SEQUENCES.items():
+                if text.startswith(sequence, i):
+                    yield key_event(sym)
+                    i += len(sequence)
+                    break
+            else:
+                # a lone escape, or a sequence we don't know about
+                yield key_event(K.ESCAPE)
+                if text.startswith("[", i) or text.startswith("O", i):
+                    while i < len(text) and not text[i].isalpha() and text[i] != "~":
+                        i += 1
+                    i += 1
+        elif char in CHARACTER_KEYS:
+            yield key_event(*CHARACTER_KEYS[char])
+        elif "a" <= char <= "z":
+            yield key_event(K.a + ord(char) - ord("a"))
+        elif "A" <= char <= "Z":
+            yield key_event(K.a + ord(char) - ord("A"), tcod.event.Modifier.LSHIFT)
+
+
+class TerminalInput:
+    """Reads key presses from a tty in raw mode."""
+
+    def __init__(self, fd: Optional[int] = None) -> None:
+        self.fd = sys.stdin.fileno() if fd is None else fd
+        self.saved_mode: Optional[list] = None
+
+    def __enter__(self) -> TerminalInput:
+        import termios
+        import tty
+
+        self.saved_mode = termios.tcgetattr(self.fd)
+        tty.setraw(self.fd)
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        import termios
+
+        if self.saved_mode is not None:
+            termios.tcsetattr(self.fd, termios.TCSADRAIN, self.saved_mode)
+
+    def wait(self, timeout: Optional[float] = None) -> List[tcod.event.Event]:
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+
+        data = os.read(self.fd, 1024)
+        if not data:
+            return [tcod.event.Quit()]
+        return list(parse_keys(data.decode("utf-8", errors="ignore")))
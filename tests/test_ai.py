@@ -0,0 +1,37 @@
+import copy
+
+from engine import Engine
+import entity_factory
+from map import GameMap
+import tile_types
+
+
+def make_map() -> GameMap:
+    player = copy.deepcopy(entity_factory.player)
+    engine = Engine(player=player)
+    gamemap = GameMap(engine, 10, 5, entities=[player])
+    gamemap.tiles[1:9, 1:4] = tile_types.floor
+    gamemap.rehash_tiles()
+    engine.map = gamemap
+    player.place(7, 2, gamemap)
+    return gamemap
+
+
+def test_path_starts_with_the_first_step() -> None:
+    gamemap = make_map()
+    rat = entity_factory.rat.spawn(gamemap, 2, 2)
+
+    path = rat.ai.get_path_to(7, 2)
+
+    # the mob's own cell isn't part of the path, so every entry is a move
+    assert (rat.x, rat.y) not in path
+    assert path[0] == (3, 2)
+    assert path[-1] == (7, 2)
+    assert len(path) == 5
+
+
+def test_path_to_own_cell_is_empty() -> None:
+    gamemap = make_map()
+    rat = entity_factory.rat.spawn(gamemap, 2, 2)
+
+    assert rat.ai.get_path_to(2, 2) == []
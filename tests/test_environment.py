@@ -0,0 +1,40 @@
+from components.status_effects import Poison
+from environment import DEATH_REWARD, MOVE_DIRECTIONS, RoguelikeEnv, WAIT
+
+
+def test_death_is_not_rewarded_as_a_kill() -> None:
+    env = RoguelikeEnv(seed=1)
+    env.reset()
+    player = env.engine.player
+    player.fighter.hp = 1
+    player.statuses.apply(Poison(duration=5, damage=10))
+
+    _, reward, done, _ = env.step(WAIT)
+
+    assert not player.is_alive
+    assert done
+    assert reward == DEATH_REWARD
+
+
+def test_impossible_actions_still_end_the_episode() -> None:
+    env = RoguelikeEnv(seed=1, max_turns=5)
+    env.reset()
+    engine = env.engine
+    walkable = engine.map.tiles["walkable"]
+    # stand the player with a wall to its left and keep walking into it
+    x, y = next(
+        (x, y)
+        for x, y in zip(*walkable.nonzero())
+        if not walkable[x - 1, y] and engine.map.get_blocking_entity(x, y) is None
+    )
+    engine.player.place(int(x), int(y), engine.map)
+    action = MOVE_DIRECTIONS.index((-1, 0)) + 1
+
+    for _ in range(env.max_turns * 10):
+        _, _, done, info = env.step(action)
+        assert not info["took_turn"]
+        if done:
+            break
+
+    assert done
+    assert env.engine.player.is_alive
@@ -0,0 +1,96 @@
+import copy
+
+from components.fighter import Fighter
+from components.status_effects import StatusEffect
+import entity_factory
+from entity import Actor, Item
+import setup_game
+
+
+class Blessing(StatusEffect):
+    name = "blessed"
+    power_bonus = 2
+    defense_bonus = 3
+
+
+def assert_fresh(fighter: Fighter) -> None:
+    # the cached stats agree with working them out from scratch
+    assert fighter.power == fighter.base_power + fighter.power_bonus
+    assert fighter.defense == fighter.base_defense + fighter.defense_bonus
+
+
+def give(player: Actor, prototype: Item) -> Item:
+    item = copy.deepcopy(prototype)
+    item.parent = player.inventory
+    player.inventory.items.append(item)
+    return item
+
+
+def test_equipping_and_unequipping_updates_stats() -> None:
+    player = setup_game.new_game(1).player
+    fighter = player.fighter
+    power, defense = fighter.power, fighter.defense
+    knife = give(player, entity_factory.knife)
+    shield = give(player, entity_factory.shield)
+
+    player.equipment.toggle_equip(knife, add_message=False)
+    assert fighter.power == power + knife.equippable.power_bonus
+    player.equipment.toggle_equip(shield, add_message=False)
+    assert fighter.defense == defense + shield.equippable.defense_bonus
+    assert_fresh(fighter)
+
+    player.equipment.toggle_equip(knife, add_message=False)
+    player.equipment.toggle_equip(shield, add_message=False)
+    assert (fighter.power, fighter.defense) == (power, defense)
+
+
+def test_swapping_weapons_updates_stats() -> None:
+    player = setup_game.new_game(1).player
+    fighter = player.fighter
+    stick = give(player, entity_factory.stick)
+    knife = give(player, entity_factory.knife)
+
+    player.equipment.toggle_equip(stick, add_message=False)
+    player.equipment.toggle_equip(knife, add_message=False)
+
+    assert player.equipment.weapon is knife
+    assert fighter.power == fighter.base_power + knife.equippable.power_bonus
+    assert_fresh(fighter)
+
+
+def test_level_up_stat_increases_update_stats() -> None:
+    player = setup_game.new_game(1).player
+    fighter = player.fighter
+    power, defense = fighter.power, fighter.defense
+
+    player.level.increase_power(2)
+    assert fighter.power == power + 2
+    player.level.increase_defense(3)
+    assert fighter.defense == defense + 3
+    assert_fresh(fighter)
+
+
+def test_effects_with_stat_bonuses_update_stats() -> None:
+    player = setup_game.new_game(1).player
+    fighter = player.fighter
+    power, defense = fighter.power, fighter.defense
+    blessing = Blessing(5)
+
+    player.statuses.apply(blessing)
+    assert (fighter.power, fighter.defense) == (power + 2, defense + 3)
+
+    player.statuses.remove(blessing)
+    assert (fighter.power, fighter.defense) == (power, defense)
+
+
+def test_effects_with_stat_bonuses_wear_off() -> None:
+    engine = setup_game.new_game(1)
+    fighter = engine.player.fighter
+    power = fighter.power
+    engine.player.statuses.apply(Blessing(1))
+    assert fighter.power == power + 2
+
+    engine.tick_effects()
+
+    assert fighter.power == power
+    assert_fresh(fighter)
@@ -0,0 +1,55 @@
+import copy
+
+import numpy as np
+import pytest
+
+from engine import Engine
+import entity_factory
+from map import SCENT_DECAY, GameMap
+import setup_game
+import tile_types
+import zobrist
+
+
+def make_map() -> GameMap:
+    player = copy.deepcopy(entity_factory.player)
+    gamemap = GameMap(Engine(player=player), 12, 8, entities=[player])
+    # a room with a corridor and a dead end leading off it
+    gamemap.tiles[1:5, 1:6] = tile_types.floor
+    gamemap.tiles[5:11, 3] = tile_types.floor
+    gamemap.tiles[8, 4:7] = tile_types.floor
+    gamemap.rehash_tiles()
+    return gamemap
+
+
+def test_scent_is_conserved_apart_from_decay() -> None:
+    gamemap = make_map()
+    # strong enough that neither SCENT_MIN nor the player's scent matter
+    gamemap.scent[2, 2] = 100.0
+    gamemap.scent[9, 3] = 50.0
+
+    for _ in range(5):
+        total = float(gamemap.scent.sum())
+        gamemap.update_scent(2, 2)
+        assert float(gamemap.scent.sum()) == pytest.approx(total * SCENT_DECAY)
+
+    assert not gamemap.scent[~gamemap.tiles["walkable"]].any()
+    assert np.count_nonzero(gamemap.scent) > 2
+
+
+def test_set_tiles_matches_a_full_rehash() -> None:
+    gamemap = make_map()
+
+    gamemap.set_tiles((2, 2), tile_types.down_stairs)
+    assert gamemap.tile_hash == zobrist.tiles_sum(gamemap.tiles)
+
+    gamemap.set_tiles((slice(3, 7), slice(2, 5)), tile_types.wall)
+    assert gamemap.tile_hash == zobrist.tiles_sum(gamemap.tiles)
+
+    gamemap.set_tiles((np.array([0, 5, 11]), np.array([0, 3, 7])), tile_types.floor)
+    assert gamemap.tile_hash == zobrist.tiles_sum(gamemap.tiles)
+
+
+def test_generated_floors_hash_incrementally() -> None:
+    engine = setup_game.new_game(7)
+    assert engine.map.tile_hash == zobrist.tiles_sum(engine.map.tiles)
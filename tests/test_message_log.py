@@ -0,0 +1,73 @@
+import pickle
+
+from message_log import MessageLog
+
+
+def fill(log: MessageLog, count: int) -> None:
+    for i in range(count):
+        log.add_message(f"message {i}", (i % 256, 0, 0))
+
+
+def texts(log: MessageLog, start: int, end: int) -> list:
+    return [message.plain_text for message in log.get_messages(start, end)]
+
+
+def test_spills_at_twice_the_memory_limit() -> None:
+    log = MessageLog(max_in_memory=4)
+
+    fill(log, 7)
+    assert log.archive.length == 0
+    assert len(log.messages) == 7
+
+    fill(log, 1)
+    assert log.archive.length == 4
+    assert len(log.messages) == 4
+    assert len(log) == 8
+
+
+def test_windows_across_the_archive_and_memory() -> None:
+    log = MessageLog(max_in_memory=4)
+    fill(log, 30)
+    archived = log.archive.length
+    assert 0 < archived < 30
+
+    assert texts(log, 0, 30) == [f"message {i}" for i in range(30)]
+    assert texts(log, archived - 2, archived + 2) == [
+        f"message {i}" for i in range(archived - 2, archived + 2)
+    ]
+    assert texts(log, 3, 5) == ["message 3", "message 4"]
+    assert texts(log, 28, 40) == ["message 28", "message 29"]
+    assert texts(log, -5, 1) == ["message 0"]
+    assert texts(log, 10, 10) == []
+
+
+def test_archived_messages_keep_colour_and_count() -> None:
+    log = MessageLog(max_in_memory=2)
+    log.add_message("again", (1, 2, 3))
+    log.add_message("again", (1, 2, 3))
+    fill(log, 5)
+
+    (message,) = log.get_messages(0, 1)
+    assert log.archive.length > 0
+    assert message.full_text == "again (x2)"
+    assert message.fg == (1, 2, 3)
+
+
+def test_pickle_round_trip_keeps_the_archive() -> None:
+    log = MessageLog(max_in_memory=4)
+    fill(log, 30)
+
+    loaded = pickle.loads(pickle.dumps(log))
+
+    assert len(loaded) == len(log)
+    assert loaded.archive.length == log.archive.length
+    assert texts(loaded, 0, 30) == texts(log, 0, 30)
+
+    # the loaded archive can still grow
+    fill(loaded, 10)
+    assert texts(loaded, 28, 32) == [
+        "message 28",
+        "message 29",
+        "message 0",
+        "message 1",
+    ]
@@ -0,0 +1,66 @@
+from pathlib import Path
+from typing import List, Optional
+
+import pytest
+from tcod.console import Console
+
+import recording
+from recording import Recorder, Recording, index_footer
+
+
+def record(
+    path: Path, monkeypatch: pytest.MonkeyPatch, screens: List[Optional[str]]
+) -> None:
+    # one frame per second, showing screens[t] in the corner, or the same
+    # screen as before where it is None
+    clock = [0.0]
+    monkeypatch.setattr(recording.time, "perf_counter", lambda: clock[0])
+    recorder = Recorder(str(path), keyframe_interval=3.0)
+    console = Console(6, 2, order="F")
+    for second, text in enumerate(screens):
+        clock[0] = float(second)
+        if text is not None:
+            console.print(0, 0, text)
+        recorder.capture(console)
+    recorder.close()
+
+
+def corner(cells) -> str:
+    return "".join(chr(ch) for ch in cells["ch"][0, :2])
+
+
+SCREENS = ["a0", "a1", None, "a3", "a4", "a5", None, None, "a8", "a9"]
+
+
+def test_frame_at_seeks_to_any_time(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path = tmp_path / "game.rec"
+    record(path, monkeypatch, SCREENS)
+    recorded = Recording(str(path))
+
+    assert recorded.duration == 9.0
+    assert recorded.keyframe_times == [0.0, 3.0, 6.0, 9.0]
+
+    shown = "a0"
+    for second, text in enumerate(SCREENS):
+        shown = text or shown
+        assert corner(recorded.frame_at(second + 0.5)) == shown
+    assert recorded.frame_at(-1.0) is None
+
+
+def test_frame_at_without_an_index(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path = tmp_path / "game.rec"
+    record(path, monkeypatch, SCREENS)
+
+    # cut off the index, as if the game had crashed
+    data = path.read_bytes()
+    (offset,) = index_footer.unpack(data[-index_footer.size :])
+    path.write_bytes(data[:offset])
+    recorded = Recording(str(path))
+
+    assert recorded.keyframe_times == [0.0, 3.0, 6.0, 9.0]
+    assert corner(recorded.frame_at(4.2)) == "a4"
+    assert corner(recorded.frame_at(7.0)) == "a5"
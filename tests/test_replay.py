@@ -0,0 +1,95 @@
+from pathlib import Path
+
+import pytest
+
+import actions
+from engine import Engine
+from headless import HeadlessEngine
+import policies
+from replay import (
+    ACTION_TYPES,
+    ActionLog,
+    ActionRecorder,
+    record_format,
+    ReplayDesync,
+    replay_headless,
+)
+
+
+def record_game(path: Path, seed: int = 3, turns: int = 150) -> Engine:
+    # plays the greedy policy the way the event handlers would: each action
+    # is recorded before it is performed, then any level ups that follow it
+    game = HeadlessEngine.new_game(seed=seed)
+    recorder = ActionRecorder(str(path), game.engine)
+
+    def level_up(engine: Engine) -> None:
+        recorder.record_level_up(0)
+        engine.player.level.increase_max_hp()
+
+    game.level_up = level_up
+    while not game.is_over and game.turns < turns:
+        action = policies.greedy_policy(game.engine)
+        recorder.record(action)
+        if not game.step(action):
+            wait = actions.WaitAction(game.engine.player)
+            recorder.record(wait)
+            game.step(wait)
+    recorder.close()
+    return game.engine
+
+
+def test_replay_matches_the_recorded_game(tmp_path: Path) -> None:
+    path = tmp_path / "game.actions"
+    engine = record_game(path)
+
+    replayed = replay_headless(ActionLog(str(path)))
+
+    assert replayed.state_hash() == engine.state_hash()
+    assert replayed.player.fighter.hp == engine.player.fighter.hp
+    assert replayed.world.current_floor == engine.world.current_floor
+
+
+@pytest.mark.parametrize("field", [1, 7])  # dx, state hash
+def test_tampered_log_raises_replay_desync(tmp_path: Path, field: int) -> None:
+    path = tmp_path / "game.actions"
+    record_game(path)
+    log = ActionLog(str(path))
+
+    # change a move early on, so the next hash no longer matches
+    i = next(
+        i
+        for i, record in enumerate(log.records)
+        if ACTION_TYPES[record[0]] is actions.BumpAction and record[1] != 0
+    )
+    record = list(log.records[i])
+    record[field] = -record[1] if field == 1 else record[7] ^ 1
+    data = bytearray(path.read_bytes())
+    offset = len(data) - (len(log) - i) * record_format.size
+    data[offset : offset + record_format.size] = record_format.pack(*record)
+    path.write_bytes(data)
+
+    with pytest.raises(ReplayDesync):
+        replay_headless(ActionLog(str(path)))
+
+
+def test_every_action_can_be_recorded() -> None:
+    concrete = {
+        cls
+        for cls in vars(actions).values()
+        if isinstance(cls, type)
+        and issubclass(cls, actions.Action)
+        and cls.__module__ == "actions"
+        and cls not in (actions.Action, actions.ActionWithDirection)
+    }
+    assert concrete <= set(ACTION_TYPES)
+
+
+def test_recording_an_unknown_action_is_a_clear_error(tmp_path: Path) -> None:
+    class Dance(actions.Action):
+        pass
+
+    game = HeadlessEngine.new_game(seed=3)
+    recorder = ActionRecorder(str(tmp_path / "game.actions"), game.engine)
+    with pytest.raises(ValueError, match="Dance can't be recorded"):
+        recorder.record(Dance(game.engine.player))
+    recorder.close()
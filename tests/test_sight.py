@@ -0,0 +1,43 @@
+import copy
+
+import numpy as np
+import tcod
+
+from engine import Engine
+import entity_factory
+from map import GameMap
+import tile_types
+
+
+def test_lines_of_sight_match_bresenham() -> None:
+    rng = np.random.default_rng(0)
+    player = copy.deepcopy(entity_factory.player)
+    gamemap = GameMap(Engine(player=player), 40, 30, entities=[player])
+    # scattered pillars, so any cell a line passes through wrongly shows up
+    gamemap.tiles[rng.random((40, 30)) < 0.7] = tile_types.floor
+    gamemap.rehash_tiles()
+    transparent = gamemap.tiles["transparent"]
+
+    for _ in range(3000):
+        x0, x1 = rng.integers(0, 40, 2).tolist()
+        y0, y1 = rng.integers(0, 30, 2).tolist()
+        line = tcod.los.bresenham((x0, y0), (x1, y1))[1:-1]
+        expected = bool(transparent[line[:, 0], line[:, 1]].all())
+
+        seen = gamemap.lines_of_sight([(x0, y0)], (x1, y1))[0]
+        assert seen == expected, ((x0, y0), (x1, y1))
+
+
+def test_lines_traced_together_match_lines_traced_alone() -> None:
+    rng = np.random.default_rng(1)
+    player = copy.deepcopy(entity_factory.player)
+    gamemap = GameMap(Engine(player=player), 40, 30, entities=[player])
+    gamemap.tiles[rng.random((40, 30)) < 0.7] = tile_types.floor
+    gamemap.rehash_tiles()
+
+    origins = [tuple(xy) for xy in rng.integers(0, 30, (200, 2)).tolist()]
+    together = gamemap.lines_of_sight(origins, (20, 15))
+    gamemap.sight_cache.clear()
+    alone = [gamemap.lines_of_sight([xy], (20, 15))[0] for xy in origins]
+
+    assert together.tolist() == alone
@@ -0,0 +1,113 @@
+from actions import WaitAction
+from components.status_effects import Confusion, Haste, Poison, Regeneration
+from engine import Engine
+from entity import Actor
+import entity_factory
+import setup_game
+
+
+def spawn_rat(engine: Engine) -> Actor:
+    # on a free floor cell away from everything else
+    gamemap = engine.map
+    taken = {(entity.x, entity.y) for entity in gamemap.entities}
+    x, y = next(
+        (int(x), int(y))
+        for x, y in zip(*gamemap.tiles["walkable"].nonzero())
+        if (x, y) not in taken
+    )
+    return entity_factory.rat.spawn(gamemap, x, y)
+
+
+def test_poison_pulses_every_turn_until_it_expires() -> None:
+    engine = setup_game.new_game(1)
+    rat = spawn_rat(engine)
+    hp = rat.fighter.hp
+    rat.statuses.apply(Poison(duration=3, damage=1))
+
+    for turn in range(1, 4):
+        engine.tick_effects()
+        assert rat.fighter.hp == hp - turn
+
+    assert not rat.statuses.active
+    engine.tick_effects()
+    assert rat.fighter.hp == hp - 3
+
+
+def test_regeneration_heals_the_player() -> None:
+    engine = setup_game.new_game(1)
+    fighter = engine.player.fighter
+    fighter.hp = fighter.max_hp - 5
+    engine.player.statuses.apply(Regeneration(duration=2, amount=2))
+
+    for _ in range(4):
+        engine.tick_effects()
+
+    assert fighter.hp == fighter.max_hp - 1
+    assert not engine.player.statuses.active
+
+
+def test_confusion_expires_with_a_message() -> None:
+    engine = setup_game.new_game(1)
+    rat = spawn_rat(engine)
+    rat.statuses.apply(Confusion(2))
+
+    engine.tick_effects()
+    assert rat.statuses.has(Confusion)
+    engine.tick_effects()
+    assert not rat.statuses.has(Confusion)
+    assert engine.message_log.messages[-1].plain_text == (
+        "The Rat is no longer confused."
+    )
+
+
+def test_stacked_effects_run_their_own_timers() -> None:
+    engine = setup_game.new_game(1)
+    rat = spawn_rat(engine)
+    hp = rat.fighter.hp
+    rat.statuses.apply(Poison(duration=1, damage=1))
+    rat.statuses.apply(Poison(duration=3, damage=1))
+
+    for _ in range(3):
+        engine.tick_effects()
+
+    assert rat.fighter.hp == hp - 4
+    assert not rat.statuses.active
+
+
+def test_dying_removes_effects() -> None:
+    engine = setup_game.new_game(1)
+    rat = spawn_rat(engine)
+    rat.statuses.apply(Poison(duration=5, damage=rat.fighter.hp))
+
+    engine.tick_effects()
+    assert not rat.is_alive
+    assert not rat.statuses.active
+    # its remaining timers find nothing to do
+    for _ in range(5):
+        engine.tick_effects()
+
+
+def test_leaving_a_floor_removes_monster_effects() -> None:
+    engine = setup_game.new_game(1)
+    rat = spawn_rat(engine)
+    rat.statuses.apply(Haste(10))
+    engine.player.statuses.apply(Haste(10))
+
+    engine.world.generate_floor()
+
+    assert not rat.statuses.active
+    assert engine.player.statuses.has(Haste)
+
+
+def test_hasted_player_acts_twice_per_turn() -> None:
+    engine = setup_game.new_game(1)
+    engine.player.statuses.apply(Haste(2))
+
+    for _ in range(4):
+        engine.handle_player_turn(WaitAction(engine.player))
+
+    # four actions took two turns, after which the haste ran out
+    assert engine.timers.now == 2
+    assert not engine.player.statuses.has(Haste)
+    engine.handle_player_turn(WaitAction(engine.player))
+    assert engine.timers.now == 3
@@ -0,0 +1,134 @@
+import io
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+import pytest
+import tcod.event
+from tcod.console import Console
+
+import main
+import setup_game
+from terminal import CSI, AnsiRenderer, parse_keys
+
+K = tcod.event.KeySym
+NONE = tcod.event.Modifier.NONE
+
+
+def keys(text: str) -> List[object]:
+    return [
+        (event.sym, event.mod) if isinstance(event, tcod.event.KeyDown) else event
+        for event in parse_keys(text)
+    ]
+
+
+def test_plain_and_shifted_keys() -> None:
+    assert keys("aZ.>\r") == [
+        (K.a, NONE),
+        (K.z, tcod.event.Modifier.LSHIFT),
+        (K.PERIOD, NONE),
+        (K.PERIOD, tcod.event.Modifier.LSHIFT),
+        (K.RETURN, NONE),
+    ]
+
+
+def test_escape_sequences() -> None:
+    assert keys("\x1b[A\x1b[6~\x1bOH") == [
+        (K.UP, NONE),
+        (K.PAGEDOWN, NONE),
+        (K.HOME, NONE),
+    ]
+
+
+def test_lone_escape() -> None:
+    assert keys("\x1b") == [(K.ESCAPE, NONE)]
+    assert keys("\x1bq") == [(K.ESCAPE, NONE), (K.q, NONE)]
+
+
+def test_unknown_sequences_are_skipped_whole() -> None:
+    # ctrl+up and F12, neither of which the game uses
+    assert keys("\x1b[1;5Ab\x1b[24~c") == [
+        (K.ESCAPE, NONE),
+        (K.b, NONE),
+        (K.ESCAPE, NONE),
+        (K.c, NONE),
+    ]
+
+
+def test_partial_sequence_at_the_end() -> None:
+    assert keys("a\x1b[1;") == [(K.a, NONE), (K.ESCAPE, NONE)]
+
+
+def test_ctrl_c_quits() -> None:
+    (event,) = parse_keys("\x03")
+    assert isinstance(event, tcod.event.Quit)
+
+
+def make_console() -> Console:
+    console = Console(4, 3, order="F")
+    console.print(0, 0, "abcd", fg=(255, 255, 255), bg=(0, 0, 0))
+    return console
+
+
+def test_first_frame_draws_every_cell() -> None:
+    stream = io.StringIO()
+    renderer = AnsiRenderer(stream)
+
+    assert renderer.present(make_console()) == 12
+    output = stream.getvalue()
+    assert output.startswith(f"{CSI}1;1H{CSI}38;2;255;255;255;48;2;0;0;0mabcd")
+    # a row ends where the next starts, so only new rows move the cursor
+    assert output.count("H") == 3
+
+
+def test_diff_of_one_cell() -> None:
+    stream = io.StringIO()
+    renderer = AnsiRenderer(stream)
+    console = make_console()
+    renderer.present(console)
+    stream.seek(0)
+    stream.truncate()
+
+    console.print(2, 0, "X", fg=(255, 255, 255), bg=(0, 0, 0))
+    assert renderer.present(console) == 1
+    # same colours as the last cell written, so no SGR codes
+    assert stream.getvalue() == f"{CSI}1;3HX"
+
+    stream.seek(0)
+    stream.truncate()
+    console.print(1, 2, "Y", fg=(255, 0, 0), bg=(0, 0, 0))
+    assert renderer.present(console) == 1
+    assert stream.getvalue() == f"{CSI}3;2H{CSI}38;2;255;0;0mY"
+
+
+def test_unchanged_frame_writes_nothing() -> None:
+    stream = io.StringIO()
+    renderer = AnsiRenderer(stream)
+    console = make_console()
+    renderer.present(console)
+    written = stream.getvalue()
+
+    assert renderer.present(console) == 0
+    assert stream.getvalue() == written
+
+
+def test_terminal_session_runs_through_the_shared_loop(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # a save is written on the way out
+    monkeypatch.chdir(tmp_path)
+    script: Iterator[str] = iter(["n", "\x1b[C", "\x03"])
+
+    def wait(timeout: Optional[float]) -> List[tcod.event.Event]:
+        return list(parse_keys(next(script)))
+
+    renderer = AnsiRenderer(io.StringIO())
+    with pytest.raises(SystemExit):
+        main.run_loop(
+            setup_game.MainMenu(),
+            Console(main.SCREEN_WIDTH, main.SCREEN_HEIGHT, order="F"),
+            renderer.present,
+            wait,
+            print_errors=False,
+        )
+
+    assert (tmp_path / "savegame.sav").exists()
@@ -0,0 +1,56 @@
+from typing import Dict, List
+
+from timer_wheel import SLOTS, TimerWheel
+
+
+def run(wheel: TimerWheel, turns: int) -> Dict[int, List[object]]:
+    # turn -> payloads fired on it
+    fired = {}
+    for _ in range(turns):
+        payloads = wheel.advance()
+        if payloads:
+            fired[wheel.now] = payloads
+    return fired
+
+
+def test_timers_fire_on_their_turn() -> None:
+    wheel = TimerWheel()
+    wheel.schedule(1, "a")
+    wheel.schedule(3, "b")
+    wheel.schedule(3, "c")
+    # delays below one turn still wait for the next one
+    wheel.schedule(0, "d")
+
+    assert run(wheel, 5) == {1: ["a", "d"], 3: ["b", "c"]}
+
+
+def test_cancelled_timers_never_fire() -> None:
+    wheel = TimerWheel()
+    timer = wheel.schedule(2, "a")
+    far = wheel.schedule(SLOTS * 3, "b")
+    wheel.schedule(2, "c")
+    timer.cancel()
+    far.cancel()
+
+    assert run(wheel, SLOTS * 4) == {2: ["c"]}
+
+
+def test_timers_cascade_down_from_coarser_wheels() -> None:
+    wheel = TimerWheel()
+    delays = [SLOTS - 1, SLOTS, SLOTS + 1, SLOTS * 5 + 7, SLOTS**2 + 3, 5000]
+    for delay in delays:
+        wheel.schedule(delay, delay)
+
+    assert run(wheel, 5001) == {delay: [delay] for delay in delays}
+
+
+def test_timers_scheduled_later_count_from_now() -> None:
+    wheel = TimerWheel()
+    run(wheel, SLOTS * 2 - 3)
+    wheel.schedule(10, "a")
+    wheel.schedule(SLOTS**2, "b")
+    start = wheel.now
+
+    fired = run(wheel, SLOTS**2 + 1)
+
+    assert fired == {start + 10: ["a"], start + SLOTS**2: ["b"]}
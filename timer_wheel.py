@@ -0,0 +1,82 @@
+"""Hierarchical timer wheel counting in game turns.
+
+Timers due within the next SLOTS turns sit in the slot for their exact turn
+on the first wheel. Later ones go on a coarser wheel, whose slots each cover
+SLOTS times as many turns, and are moved down a wheel when their slot comes
+round. Advancing a turn only touches the timers that fire and the ones moved
+down, so thousands of long running timers cost nothing until they are due.
+"""
+
+from __future__ import annotations
+
+from typing import Any, List
+
+SLOT_BITS = 6
+SLOTS = 1 << SLOT_BITS
+SLOT_MASK = SLOTS - 1
+LEVELS = 4
+
+
+class Timer:
+    __slots__ = ("expires", "payload", "cancelled")
+
+    def __init__(self, expires: int, payload: Any) -> None:
+        self.expires = expires
+        self.payload = payload
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        # removed lazily, when its slot is next looked at
+        self.cancelled = True
+
+
+class TimerWheel:
+    def __init__(self) -> None:
+        self.now = 0
+        self.wheels: List[List[List[Timer]]] = [
+            [[] for _ in range(SLOTS)] for _ in range(LEVELS)
+        ]
+
+    def schedule(self, delay: int, payload: Any) -> Timer:
+        """Fire payload after delay turns, at least one."""
+        timer = Timer(self.now + max(delay, 1), payload)
+        self.insert(timer)
+        return timer
+
+    def insert(self, timer: Timer) -> None:
+        delta = timer.expires - self.now
+        for level in range(LEVELS):
+            if delta < 1 << (SLOT_BITS * (level + 1)) or level == LEVELS - 1:
+                slot = (timer.expires >> (SLOT_BITS * level)) & SLOT_MASK
+                self.wheels[level][slot].append(timer)
+                return
+
+    def advance(self) -> List[Any]:
+        """Move on one turn and return the payloads of the timers that fired."""
+        self.now += 1
+
+        # a coarse slot is emptied into the finer wheels whenever the finer
+        # wheel below it has gone all the way round
+        for level in range(1, LEVELS):
+            if (self.now >> (SLOT_BITS * (level - 1))) & SLOT_MASK:
+                break
+            slot = (self.now >> (SLOT_BITS * level)) & SLOT_MASK
+            timers = self.wheels[level][slot]
+            self.wheels[level][slot] = []
+            for timer in timers:
+                if not timer.cancelled:
+                    self.insert(timer)
+
+        slot = self.now & SLOT_MASK
+        due = self.wheels[0][slot]
+        self.wheels[0][slot] = []
+        fired = []
+        for timer in due:
+            if timer.cancelled:
+                continue
+            if timer.expires > self.now:
+                # more than LEVELS wheels away, goes round again
+                self.insert(timer)
+            else:
+                fired.append(timer.payload)
+        return fired
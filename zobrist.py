@@ -0,0 +1,114 @@
+"""Incrementally updated hashes of the game state.
+
+The hash of a map is the sum, modulo 2**64, of one 64-bit term per tile
+and one per entity, so changing a single tile or entity only means
+subtracting its old term and adding the new one. Terms come from a fixed
+hash function rather than Python's hash(), which is salted per process,
+so the same state hashes the same in every run and every process.
+
+Sums are used instead of the classic XOR because two identical entities
+on the same tile, such as two rat corpses, would cancel out under XOR.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from typing import Dict, Tuple, Union, TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from entity import Entity
+
+MASK = (1 << 64) - 1
+
+TileIndex = Union[Tuple[int, int], Tuple[slice, slice], Tuple[np.ndarray, np.ndarray]]
+
+_tile_keys: Dict[bytes, int] = {}
+
+
+def mix(z: int) -> int:
+    # splitmix64 finalizer, spreads every input bit over the whole output
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK
+    return z ^ (z >> 31)
+
+
+def mix_array(z: np.ndarray) -> np.ndarray:
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def stable_key(*parts: object) -> int:
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def tile_key(tile: np.ndarray) -> int:
+    raw = tile.tobytes()
+    key = _tile_keys.get(raw)
+    if key is None:
+        key = _tile_keys[raw] = stable_key("tile", raw)
+    return key
+
+
+def tile_term(x: int, y: int, tile: np.ndarray) -> int:
+    return mix((x << 32 | y) ^ tile_key(tile))
+
+
+def tile_keys(tiles: np.ndarray) -> np.ndarray:
+    # tile_key of every tile, as a uint64 array of the same shape
+    raw = np.ascontiguousarray(tiles).reshape(-1).view(f"V{tiles.dtype.itemsize}")
+    unique, inverse = np.unique(raw, return_inverse=True)
+    return np.array(
+        [
+            tile_key(np.frombuffer(value.tobytes(), dtype=tiles.dtype))
+            for value in unique
+        ],
+        dtype=np.uint64,
+    )[inverse.reshape(-1)].reshape(tiles.shape)
+
+
+def tiles_sum(tiles: np.ndarray, x0: int = 0, y0: int = 0) -> int:
+    # sum of the terms of a block of tiles whose corner is at (x0, y0)
+    if tiles.size == 0:
+        return 0
+
+    xs = np.arange(x0, x0 + tiles.shape[0], dtype=np.uint64)[:, None]
+    ys = np.arange(y0, y0 + tiles.shape[1], dtype=np.uint64)[None, :]
+    terms = mix_array(((xs << np.uint64(32)) | ys) ^ tile_keys(tiles))
+    return int(terms.sum(dtype=np.uint64))
+
+
+def cells_sum(xs: np.ndarray, ys: np.ndarray, tiles: np.ndarray) -> int:
+    # sum of the terms of tiles[i] standing at (xs[i], ys[i])
+    if tiles.size == 0:
+        return 0
+
+    xs = xs.astype(np.uint64)
+    ys = ys.astype(np.uint64)
+    terms = mix_array(((xs << np.uint64(32)) | ys) ^ tile_keys(tiles))
+    return int(terms.sum(dtype=np.uint64))
+
+
+def entity_term(entity: Entity) -> int:
+    # position, hp, ai and status effects, with the name to tell apart
+    # entities that share the rest
+    parts = [entity.name, int(entity.x), int(entity.y)]
+
+    fighter = getattr(entity, "fighter", None)
+    if fighter is not None:
+        parts.append(fighter.hp)
+
+    ai = getattr(entity, "ai", None)
+    if ai is not None:
+        parts.append(type(ai).__name__)
+
+    statuses = getattr(entity, "statuses", None)
+    if statuses is not None:
+        parts.extend(
+            (type(effect).__name__, effect.expires) for effect in statuses.active
+        )
+
+    return stable_key(*parts)